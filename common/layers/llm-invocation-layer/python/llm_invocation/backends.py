@@ -5,7 +5,8 @@ from __future__ import annotations
 import json
 import os
 from itertools import cycle
-from typing import Any, Callable, Dict, List, Sequence
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Sequence, Tuple
 import time
 
 import boto3
@@ -25,6 +26,9 @@ from common_utils.get_secret import get_secret
 
 logger = configure_logger(__name__)
 
+# compact encoder bound once for Bedrock request bodies
+_encode_body = json.JSONEncoder(separators=(",", ":")).encode
+
 _secret_name = (
     get_config("BEDROCK_SECRET_NAME")
     or os.environ.get("BEDROCK_SECRET_NAME", "BEDROCK_API_KEY")
@@ -33,6 +37,19 @@ BEDROCK_API_KEY = get_secret(_secret_name)
 OLLAMA_DEFAULT_MODEL = (
     get_config("OLLAMA_DEFAULT_MODEL") or os.environ.get("OLLAMA_DEFAULT_MODEL", "")
 )
+# Model used by ``invoke_bedrock_runtime`` when the caller does not pass one
+BEDROCK_DEFAULT_MODEL_ID = (
+    get_config("STRONG_MODEL_ID")
+    or os.environ.get("STRONG_MODEL_ID")
+    or get_config("WEAK_MODEL_ID")
+    or os.environ.get("WEAK_MODEL_ID")
+)
+# Build the Bedrock runtime client in ``warmup`` rather than on first use.
+# Off by default so Ollama-only deployments never create it.
+BEDROCK_RUNTIME_WARMUP = (
+    get_config("BEDROCK_RUNTIME_WARMUP")
+    or os.environ.get("BEDROCK_RUNTIME_WARMUP", "false")
+).lower() == "true"
 
 # Default sampling parameters for Bedrock models
 DEFAULT_BEDROCK_TEMPERATURE = 0.5
@@ -67,6 +84,23 @@ BEDROCK_MAX_TOKENS_TO_SAMPLE = int(
     )
 )
 
+# Defaults merged under every Bedrock OpenAI payload, and the fixed headers
+_BEDROCK_DEFAULTS = MappingProxyType(
+    {
+        "temperature": BEDROCK_TEMPERATURE,
+        "num_ctx": BEDROCK_NUM_CTX,
+        "max_tokens": BEDROCK_MAX_TOKENS,
+        "top_p": BEDROCK_TOP_P,
+        "top_k": BEDROCK_TOP_K,
+        "max_tokens_to_sample": BEDROCK_MAX_TOKENS_TO_SAMPLE,
+    }
+)
+_BEDROCK_HEADERS = MappingProxyType(
+    {"Content-Type": "application/json", "Authorization": f"Bearer {BEDROCK_API_KEY}"}
+    if BEDROCK_API_KEY
+    else {"Content-Type": "application/json"}
+)
+
 # Default sampling parameters for Ollama
 DEFAULT_OLLAMA_NUM_CTX = 4096
 DEFAULT_OLLAMA_REPEAT_LAST_N = 64
@@ -113,33 +147,50 @@ OLLAMA_MIN_P = float(
     get_config("OLLAMA_MIN_P") or os.environ.get("OLLAMA_MIN_P", str(DEFAULT_OLLAMA_MIN_P))
 )
 
+# Defaults merged under every Ollama payload
+_OLLAMA_DEFAULTS = MappingProxyType(
+    {
+        "model": OLLAMA_DEFAULT_MODEL,
+        "num_ctx": OLLAMA_NUM_CTX,
+        "repeat_last_n": OLLAMA_REPEAT_LAST_N,
+        "repeat_penalty": OLLAMA_REPEAT_PENALTY,
+        "temperature": OLLAMA_TEMPERATURE,
+        "seed": OLLAMA_SEED,
+        "stop": OLLAMA_STOP,
+        "num_predict": OLLAMA_NUM_PREDICT,
+        "top_k": OLLAMA_TOP_K,
+        "top_p": OLLAMA_TOP_P,
+        "min_p": OLLAMA_MIN_P,
+    }
+)
+
 
-def _get_endpoints(plural_var: str, single_var: str) -> List[str]:
-    """Return a list of endpoint URLs read from environment variables."""
+def _get_endpoints(plural_var: str, single_var: str) -> Tuple[str, ...]:
+    """Return the endpoint URLs read from environment variables."""
 
     raw = get_config(plural_var) or os.environ.get(plural_var)
     if raw:
-        parts = [p.strip() for p in raw.split(",") if p.strip()]
+        parts = tuple(p for p in map(str.strip, raw.split(",")) if p)
         if parts:
             return parts
     single = get_config(single_var) or os.environ.get(single_var)
-    return [single] if single else []
+    return (single,) if single else ()
 
 
 def _make_selector(endpoints: Sequence[str]) -> Callable[[], str]:
-    """Return a round-robin selector over ``endpoints``."""
+    """Return a round-robin selector over ``endpoints``.
+
+    The selector is the bound ``__next__`` of an :func:`itertools.cycle`,
+    which runs as a single C call under the GIL, so concurrent threads each
+    get the next endpoint in strict order without a lock.
+    """
 
     if not endpoints:
         def _select() -> str:
             raise RuntimeError("No endpoints configured")
         return _select
 
-    cyc = cycle(endpoints)
-
-    def _select() -> str:
-        return next(cyc)
-
-    return _select
+    return cycle(tuple(endpoints)).__next__
 
 
 class _HealthCheckedSelector:
@@ -152,7 +203,7 @@ class _HealthCheckedSelector:
         cooldown: int = 60,
     ) -> None:
         """Create a selector over ``endpoints`` with failure tracking."""
-        self._endpoints = list(endpoints)
+        self._endpoints = tuple(endpoints)
         self._cycle = cycle(self._endpoints) if self._endpoints else None
         self._failures = {ep: 0 for ep in self._endpoints}
         self._last_failure = {ep: 0.0 for ep in self._endpoints}
@@ -168,7 +219,7 @@ class _HealthCheckedSelector:
             ep = next(self._cycle)
             fails = self._failures.get(ep, 0)
             last = self._last_failure.get(ep, 0.0)
-            if fails < self._threshold or time.time() - last >= self._cooldown:
+            if fails < self._threshold or time.monotonic() - last >= self._cooldown:
                 return ep
 
         return next(self._cycle)
@@ -182,7 +233,7 @@ class _HealthCheckedSelector:
         """Increment failure count for ``endpoint`` and update cooldown time."""
         if endpoint in self._failures:
             self._failures[endpoint] += 1
-            self._last_failure[endpoint] = time.time()
+            self._last_failure[endpoint] = time.monotonic()
 
 
 BEDROCK_OPENAI_ENDPOINTS = _get_endpoints(
@@ -205,25 +256,59 @@ def choose_ollama_endpoint() -> str:
     return _ollama_selector.choose()
 
 
+_BEDROCK_RUNTIME = None
+_HTTP_CLIENT = None
+
+
+def _get_http_client():
+    """Return the shared pooled ``httpx.Client`` used for backend requests."""
+
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None:
+        keepalive = max(len(OLLAMA_ENDPOINTS) + len(BEDROCK_OPENAI_ENDPOINTS), 1)
+        _HTTP_CLIENT = httpx.Client(
+            limits=httpx.Limits(max_keepalive_connections=keepalive)
+        )
+    return _HTTP_CLIENT
+
+
+def _get_bedrock_runtime():
+    """Return the shared ``bedrock-runtime`` client, creating it on first use."""
+
+    global _BEDROCK_RUNTIME
+    if _BEDROCK_RUNTIME is None:
+        _BEDROCK_RUNTIME = boto3.client("bedrock-runtime")
+    return _BEDROCK_RUNTIME
+
+
+def warmup() -> None:
+    """Create the shared clients ahead of the first request.
+
+    Call at Lambda init so warm invocations only dispatch. The HTTP client
+    is built when any endpoints are configured; the Bedrock runtime client
+    only when ``BEDROCK_RUNTIME_WARMUP`` is enabled and no OpenAI-compatible
+    Bedrock endpoints are set, and is otherwise created on first use.
+    """
+
+    if OLLAMA_ENDPOINTS or BEDROCK_OPENAI_ENDPOINTS:
+        _get_http_client()
+    if BEDROCK_RUNTIME_WARMUP and not BEDROCK_OPENAI_ENDPOINTS:
+        _get_bedrock_runtime()
+
+
 def invoke_bedrock_runtime(
     prompt: str, model_id: str | None = None, system_prompt: str | None = None
 ) -> Dict[str, Any]:
     """Call Bedrock using its OpenAI compatible runtime."""
 
-    runtime = boto3.client("bedrock-runtime")
-    model_id = (
-        model_id
-        or get_config("STRONG_MODEL_ID")
-        or os.environ.get("STRONG_MODEL_ID")
-        or get_config("WEAK_MODEL_ID")
-        or os.environ.get("WEAK_MODEL_ID")
-    )
+    runtime = _get_bedrock_runtime()
+    model_id = model_id or BEDROCK_DEFAULT_MODEL_ID
 
     messages = [{"role": "user", "content": prompt}]
     if system_prompt is not None:
         messages.insert(0, {"role": "system", "content": system_prompt})
 
-    body = json.dumps(
+    body = _encode_body(
         {
             "model": model_id,
             "messages": messages,
@@ -263,17 +348,9 @@ def invoke_bedrock_openai(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Send ``payload`` to a Bedrock OpenAI endpoint and return the response."""
 
     endpoint = choose_bedrock_openai_endpoint()
-    headers = {"Content-Type": "application/json"}
-    if BEDROCK_API_KEY:
-        headers["Authorization"] = f"Bearer {BEDROCK_API_KEY}"
-    payload.setdefault("temperature", BEDROCK_TEMPERATURE)
-    payload.setdefault("num_ctx", BEDROCK_NUM_CTX)
-    payload.setdefault("max_tokens", BEDROCK_MAX_TOKENS)
-    payload.setdefault("top_p", BEDROCK_TOP_P)
-    payload.setdefault("top_k", BEDROCK_TOP_K)
-    payload.setdefault("max_tokens_to_sample", BEDROCK_MAX_TOKENS_TO_SAMPLE)
+    payload = {**_BEDROCK_DEFAULTS, **payload}
     try:
-        resp = httpx.post(endpoint, json=payload, headers=headers)
+        resp = _get_http_client().post(endpoint, json=payload, headers=_BEDROCK_HEADERS)
         resp.raise_for_status()
     except HTTPError as exc:
         logger.exception("Bedrock OpenAI request failed")
@@ -288,20 +365,9 @@ def invoke_ollama(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Send ``payload`` to an Ollama endpoint and return the response."""
 
     endpoint = choose_ollama_endpoint()
-    payload.setdefault("model", OLLAMA_DEFAULT_MODEL)
-
-    payload.setdefault("num_ctx", OLLAMA_NUM_CTX)
-    payload.setdefault("repeat_last_n", OLLAMA_REPEAT_LAST_N)
-    payload.setdefault("repeat_penalty", OLLAMA_REPEAT_PENALTY)
-    payload.setdefault("temperature", OLLAMA_TEMPERATURE)
-    payload.setdefault("seed", OLLAMA_SEED)
-    payload.setdefault("stop", OLLAMA_STOP)
-    payload.setdefault("num_predict", OLLAMA_NUM_PREDICT)
-    payload.setdefault("top_k", OLLAMA_TOP_K)
-    payload.setdefault("top_p", OLLAMA_TOP_P)
-    payload.setdefault("min_p", OLLAMA_MIN_P)
+    payload = {**_OLLAMA_DEFAULTS, **payload}
     try:
-        resp = httpx.post(endpoint, json=payload)
+        resp = _get_http_client().post(endpoint, json=payload)
         resp.raise_for_status()
     except HTTPError as exc:
         logger.exception("Ollama request failed")
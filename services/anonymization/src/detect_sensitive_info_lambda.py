@@ -7,9 +7,9 @@ Description:
   Detect PII entities in text using ML models and regex fallbacks.
 
 
-Version: 1.0.0
+Version: 1.0.1
 Created: 2025-05-05
-Last Modified: 2025-06-28
+Last Modified: 2026-10-16
 Modified By: Koushik Sinha
 """
 
@@ -36,7 +36,7 @@ logger = configure_logger(__name__)
 
 # Module Metadata
 __author__ = "Koushik Sinha"
-__version__ = "1.0.0"
+__version__ = "1.0.1"
 __modified_by__ = "Koushik Sinha"
 
 _ENGINE: "AnalyzerEngine" | None = None
@@ -123,56 +123,70 @@ _DEFAULT_LEGAL_REGEX_PATTERNS = {
     "CASE_NUMBER": r"\b\d{2}-\d{5}\b",
 }
 
-_REGEX_PATTERNS: Dict[str, str] = {}
-_LEGAL_REGEX_PATTERNS: Dict[str, str] = {}
+_REGEX_PATTERNS: Dict[str, re.Pattern[str]] = {}
+_LEGAL_REGEX_PATTERNS: Dict[str, re.Pattern[str]] = {}
+_LEGAL_DOMAIN_PATTERNS: Dict[str, re.Pattern[str]] = {}
+
+
+def _compile_patterns(patterns: Dict[str, str]) -> Dict[str, re.Pattern[str]]:
+    """Compile ``patterns``, skipping and logging any that are invalid."""
+
+    compiled: Dict[str, re.Pattern[str]] = {}
+    for typ, pattern in patterns.items():
+        try:
+            compiled[typ] = re.compile(pattern)
+        except re.error as exc:
+            logger.error("Invalid regex pattern for %s: %s", typ, exc)
+    return compiled
 
 
 def _load_regex_patterns() -> None:
-    """Load regex patterns from environment variables."""
+    """Load and compile regex patterns from environment variables."""
 
-    global _REGEX_PATTERNS, _LEGAL_REGEX_PATTERNS
-    _REGEX_PATTERNS = dict(_DEFAULT_REGEX_PATTERNS)
-    _LEGAL_REGEX_PATTERNS = dict(_DEFAULT_LEGAL_REGEX_PATTERNS)
+    global _REGEX_PATTERNS, _LEGAL_REGEX_PATTERNS, _LEGAL_DOMAIN_PATTERNS
+    patterns = dict(_DEFAULT_REGEX_PATTERNS)
+    legal_patterns = dict(_DEFAULT_LEGAL_REGEX_PATTERNS)
 
     env_patterns = get_config("REGEX_PATTERNS") or os.environ.get("REGEX_PATTERNS")
     if env_patterns:
         try:
-            _REGEX_PATTERNS.update(json.loads(env_patterns))
+            patterns.update(json.loads(env_patterns))
         except Exception as exc:  # pragma: no cover - runtime safety
             logger.exception("Invalid REGEX_PATTERNS: %s", exc)
 
     env_legal = get_config("LEGAL_REGEX_PATTERNS") or os.environ.get("LEGAL_REGEX_PATTERNS")
     if env_legal:
         try:
-            _LEGAL_REGEX_PATTERNS.update(json.loads(env_legal))
+            legal_patterns.update(json.loads(env_legal))
         except Exception as exc:  # pragma: no cover - runtime safety
             logger.exception("Invalid LEGAL_REGEX_PATTERNS: %s", exc)
 
+    _REGEX_PATTERNS = _compile_patterns(patterns)
+    _LEGAL_REGEX_PATTERNS = _compile_patterns(legal_patterns)
+    _LEGAL_DOMAIN_PATTERNS = {**_REGEX_PATTERNS, **_LEGAL_REGEX_PATTERNS}
+
 
 _load_regex_patterns()
 
 
-def _regex_entities(text: str, patterns: Dict[str, str] | None = None) -> List[Dict[str, Any]]:
+def _regex_entities(
+    text: str, patterns: Dict[str, re.Pattern[str]] | None = None
+) -> List[Dict[str, Any]]:
     """Return regex-based PII matches."""
 
     if patterns is None:
         patterns = _REGEX_PATTERNS
 
-    matches: List[Dict[str, Any]] = []
-    for typ, pattern in patterns.items():
-        try:
-            for match in re.finditer(pattern, text):
-                matches.append(
-                    {
-                        "text": match.group(0),
-                        "type": typ,
-                        "start": match.start(),
-                        "end": match.end(),
-                    }
-                )
-        except re.error as exc:  # pragma: no cover - runtime safety
-            logger.exception("Invalid regex pattern for %s: %s", typ, exc)
-    return matches
+    return [
+        {
+            "text": match.group(0),
+            "type": typ,
+            "start": match.start(),
+            "end": match.end(),
+        }
+        for typ, pattern in patterns.items()
+        for match in pattern.finditer(text)
+    ]
 
 
 def _ml_entities(text: str, engine: "AnalyzerEngine" | None = None) -> List[Dict[str, Any]]:
@@ -219,7 +233,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             engine = _load_medical_model()
         elif domain == "Legal":
             engine = _load_legal_model()
-            regex_patterns = {**_REGEX_PATTERNS, **_LEGAL_REGEX_PATTERNS}
+            regex_patterns = _LEGAL_DOMAIN_PATTERNS
         else:
             engine = _load_model()
 
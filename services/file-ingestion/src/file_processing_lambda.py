@@ -8,9 +8,9 @@ Description:
   2. Copies the uploaded file to the IDP bucket so downstream services can
      automatically process the document.
 
-Version: 1.0.2
+Version: 1.0.3
 Created: 2025-05-05
-Last Modified: 2025-06-28
+Last Modified: 2026-10-16
 Modified By: Koushik Sinha
 """
 
@@ -19,8 +19,6 @@ import os
 import uuid
 import boto3
 import logging
-import re
-from urllib.parse import urlparse
 try:
     from botocore.exceptions import ClientError, BotoCoreError
 except ModuleNotFoundError:  # pragma: no cover - fallback for minimal env
@@ -35,6 +33,7 @@ from common_utils.get_ssm import (
     get_environment_prefix,
     parse_s3_uri,
 )
+from file_validators import validate_event
 
 
 class CopyVerificationError(Exception):
@@ -44,7 +43,7 @@ from models import FileProcessingEvent
 
 # Module Metadata
 __author__ = "Koushik Sinha"
-__version__ = "1.0.2"
+__version__ = "1.0.3"
 __modified_by__ = "Koushik Sinha"
 
 # ─── Logging Configuration ─────────────────────────────────────────────────────
@@ -64,56 +63,6 @@ except Exception:  # pragma: no cover - SSM unavailable
 _audit_table_name = _audit_table_name or os.environ.get("DOCUMENT_AUDIT_TABLE")
 _audit_table = _dynamo.Table(_audit_table_name) if _dynamo and _audit_table_name else None
 
-# allowed characters for collection names
-COLLECTION_PATTERN = re.compile(r"^[A-Za-z0-9._-]+$")
-
-
-def _is_valid_bucket_name(name: str) -> bool:
-    """Return ``True`` if *name* is a valid S3 bucket name."""
-
-    if len(name) < 3 or len(name) > 63:
-        return False
-    if not re.match(r"^[a-z0-9][a-z0-9.-]+[a-z0-9]$", name):
-        return False
-    if ".." in name or ".-" in name or "-." in name:
-        return False
-    if re.match(r"^(?:\d{1,3}\.){3}\d{1,3}$", name):
-        return False
-    return True
-
-
-def _validate_event(event: FileProcessingEvent) -> None:
-    """Validate and sanitize incoming ``FileProcessingEvent``."""
-
-    if not isinstance(event.file, str):
-        raise ValueError("invalid file path")
-
-    parsed = urlparse(event.file)
-    if parsed.scheme != "s3" or not parsed.netloc or not parsed.path:
-        raise ValueError("invalid file path")
-
-    bucket = parsed.netloc
-    key = parsed.path.lstrip("/")
-
-    if not _is_valid_bucket_name(bucket):
-        raise ValueError("invalid file path")
-
-    if not key or "//" in parsed.path:
-        raise ValueError("invalid file path")
-
-    if any(ord(c) < 32 or ord(c) == 127 for c in key):
-        raise ValueError("invalid file path")
-
-    if any(part in {"..", "."} for part in key.split("/")):
-        raise ValueError("invalid file path")
-
-    if (
-        event.collection_name is None
-        or not isinstance(event.collection_name, str)
-        or not COLLECTION_PATTERN.match(event.collection_name)
-    ):
-        raise ValueError("invalid collection_name")
-
 def copy_file_to_idp(bucket_name: str, bucket_key: str) -> str:
     """Copy the file to the IDP bucket RAW_PREFIX and return the destination URI."""
 
@@ -150,7 +99,7 @@ def copy_file_to_idp(bucket_name: str, bucket_key: str) -> str:
 def process_files(event: FileProcessingEvent, context) -> dict:
     """Copy the uploaded file to the IDP bucket and return its location."""
 
-    _validate_event(event)
+    validate_event(event)
 
     try:
         bucket_name, bucket_key = parse_s3_uri(event.file)
@@ -226,7 +175,7 @@ def lambda_handler(event: FileProcessingEvent | dict, context) -> dict:
                 logger.error("Invalid event: %s", exc)
                 return lambda_response(400, {"error": str(exc)})
         try:
-            _validate_event(event)
+            validate_event(event)
         except ValueError as exc:
             logger.error("Invalid event: %s", exc)
             return lambda_response(400, {"error": str(exc)})
@@ -0,0 +1,64 @@
+"""Input validation for :mod:`file_processing_lambda`.
+
+Kept free of AWS imports so the checks can be exercised without loading
+boto3 or the handler module.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from models import FileProcessingEvent
+
+# allowed characters for collection names
+COLLECTION_PATTERN = re.compile(r"^[A-Za-z0-9._-]+$")
+
+
+def is_valid_bucket_name(name: str) -> bool:
+    """Return ``True`` if *name* is a valid S3 bucket name."""
+
+    if len(name) < 3 or len(name) > 63:
+        return False
+    if not re.match(r"^[a-z0-9][a-z0-9.-]+[a-z0-9]$", name):
+        return False
+    if ".." in name or ".-" in name or "-." in name:
+        return False
+    if re.match(r"^(?:\d{1,3}\.){3}\d{1,3}$", name):
+        return False
+    return True
+
+
+def validate_event(event: FileProcessingEvent) -> None:
+    """Validate and sanitize incoming ``FileProcessingEvent``."""
+
+    if not isinstance(event.file, str):
+        raise ValueError("invalid file path")
+
+    parsed = urlparse(event.file)
+    if parsed.scheme != "s3" or not parsed.netloc or not parsed.path:
+        raise ValueError("invalid file path")
+
+    bucket = parsed.netloc
+    key = parsed.path.lstrip("/")
+
+    if not is_valid_bucket_name(bucket):
+        raise ValueError("invalid file path")
+
+    if not key or "//" in parsed.path:
+        raise ValueError("invalid file path")
+
+    if any(ord(c) < 32 or ord(c) == 127 for c in key):
+        raise ValueError("invalid file path")
+
+    if any(part in {"..", "."} for part in key.split("/")):
+        raise ValueError("invalid file path")
+
+    if (
+        event.collection_name is None
+        or not isinstance(event.collection_name, str)
+        or not COLLECTION_PATTERN.match(event.collection_name)
+    ):
+        raise ValueError("invalid collection_name")
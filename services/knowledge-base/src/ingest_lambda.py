@@ -12,7 +12,7 @@ from botocore.exceptions import ClientError
 
 # Module Metadata
 __author__ = "Koushik Sinha"
-__version__ = "1.0.0"
+__version__ = "1.0.1"
 __modified_by__ = "Koushik Sinha"
 
 logger = configure_logger(__name__)
@@ -62,7 +62,7 @@ def lambda_handler(event: dict, context: object) -> dict:
     try:
         sfn.start_execution(
             stateMachineArn=FILE_INGESTION_STATE_MACHINE_ARN,
-            input=json.dumps(event),
+            input=json.dumps(event, separators=(",", ":")),
         )
     except ClientError as exc:
         logger.error("Failed to start file ingestion state machine: %s", exc)
@@ -95,7 +95,7 @@ def lambda_handler(event: dict, context: object) -> dict:
     try:
         sfn.start_execution(
             stateMachineArn=STATE_MACHINE_ARN,
-            input=json.dumps(payload),
+            input=json.dumps(payload, separators=(",", ":")),
         )
     except ClientError as exc:
         logger.error("Failed to start state machine: %s", exc)
@@ -16,7 +16,7 @@ from botocore.exceptions import ClientError
 
 # Module Metadata
 __author__ = "Koushik Sinha"
-__version__ = "1.0.0"
+__version__ = "1.0.1"
 __modified_by__ = "Koushik Sinha"
 
 logger = configure_logger(__name__)
@@ -41,7 +41,7 @@ def lambda_handler(event: dict, context: object) -> dict:
     try:
         sqs_client.send_message(
             QueueUrl=queue_url,
-            MessageBody=json.dumps(event),
+            MessageBody=json.dumps(event, separators=(",", ":")),
         )
     except ClientError as exc:
         logger.error("Failed to queue summary request: %s", exc)
@@ -11,6 +11,7 @@ routing strategies can delegate all model interactions here.
 from __future__ import annotations
 
 import logging
+from dataclasses import asdict
 from common_utils import configure_logger, lambda_response
 from typing import Any, Dict
 from models import LlmInvocationEvent, LambdaResponse
@@ -20,17 +21,20 @@ from llm_invoke import (
     invoke_bedrock_runtime,
     invoke_ollama,
 )
-from llm_invocation.backends import BEDROCK_OPENAI_ENDPOINTS
+from llm_invocation.backends import BEDROCK_OPENAI_ENDPOINTS, warmup
 from httpx import HTTPStatusError
 import json
 
 # Module Metadata
 __author__ = "Koushik Sinha"
-__version__ = "1.0.0"
+__version__ = "1.0.2"
 __modified_by__ = "Koushik Sinha"
 
 logger = configure_logger(__name__)
 
+# build the configured backend clients during init rather than on first request
+warmup()
+
 
 
 
@@ -51,19 +55,13 @@ def _process_event(event: LlmInvocationEvent) -> LambdaResponse:
     :class:`models.LambdaResponse`
         Raw backend response wrapped in an HTTP style object.
     """
-    from dataclasses import asdict
-    data = event if isinstance(event, dict) else asdict(event)
-    backend = data.get("backend")
-    prompt = data.get("prompt")
-    system_prompt = data.get("system_prompt")
+    payload = dict(event) if isinstance(event, dict) else asdict(event)
+    backend = payload.pop("backend", None)
+    system_prompt = payload.pop("system_prompt", None)
+    prompt = payload.get("prompt")
     if not backend or not prompt:
         return {"message": "Missing backend or prompt"}
 
-    from dataclasses import asdict
-    payload = dict(event) if isinstance(event, dict) else asdict(event)
-    payload.pop("backend", None)
-    payload.pop("system_prompt", None)
-
     try:
         if backend == "bedrock":
             if BEDROCK_OPENAI_ENDPOINTS:
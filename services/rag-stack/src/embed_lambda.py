@@ -10,14 +10,14 @@ import json
 import logging
 from common_utils import configure_logger
 
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List
 
 from common_utils.get_ssm import get_config
 from common_utils.get_secret import get_secret
 
 # Module Metadata
 __author__ = "Koushik Sinha"
-__version__ = "1.0.0"
+__version__ = "1.0.3"
 __modified_by__ = "Koushik Sinha"
 
 logger = configure_logger(__name__)
@@ -31,12 +31,25 @@ try:
 except json.JSONDecodeError:
     DEFAULT_EMBED_MODEL_MAP = {}
 
+try:
+    EMBED_BATCH_SIZE = max(
+        1, int(get_config("EMBED_BATCH_SIZE") or os.environ.get("EMBED_BATCH_SIZE", "96"))
+    )
+except ValueError:
+    EMBED_BATCH_SIZE = 96
+
+# Maximum number of texts each provider accepts in one embed request.
+_PROVIDER_BATCH_LIMITS = {
+    "openai": 2048,
+    "cohere": 96,
+}
+
 
 _SBERT_MODEL = None
 
 
-def _sbert_embed(text: str) -> List[float]:
-    """Embed ``text`` using a SentenceTransformer model."""
+def _load_sbert_model():
+    """Return the cached SentenceTransformer model, loading it on first use."""
 
     global _SBERT_MODEL
     if _SBERT_MODEL is None:
@@ -62,23 +75,29 @@ def _sbert_embed(text: str) -> List[float]:
 
         _SBERT_MODEL = SentenceTransformer(model_path)
 
-    return _SBERT_MODEL.encode([text])[0].tolist()
+    return _SBERT_MODEL
 
 
-def _openai_embed(text: str) -> List[float]:
-    """Embed ``text`` using the OpenAI API."""
+def _sbert_embed_batch(texts: List[str]) -> List[List[float]]:
+    """Embed ``texts`` with one SentenceTransformer ``encode`` call."""
+
+    return _load_sbert_model().encode(texts).tolist()
+
+
+def _openai_embed_batch(texts: List[str]) -> List[List[float]]:
+    """Embed ``texts`` with a single OpenAI API request."""
 
     import openai  # type: ignore
 
     model = get_config("OPENAI_EMBED_MODEL") or os.environ.get(
         "OPENAI_EMBED_MODEL", "text-embedding-ada-002"
     )
-    resp = openai.Embedding.create(input=[text], model=model)
-    return resp["data"][0]["embedding"]
+    resp = openai.Embedding.create(input=texts, model=model)
+    return [item["embedding"] for item in resp["data"]]
 
 
-def _cohere_embed(text: str) -> List[float]:
-    """Embed ``text`` using the Cohere API."""
+def _cohere_embed_batch(texts: List[str]) -> List[List[float]]:
+    """Embed ``texts`` with a single Cohere API request."""
 
     import cohere  # type: ignore
 
@@ -87,23 +106,51 @@ def _cohere_embed(text: str) -> List[float]:
     )
     api_key = get_secret(secret)
     client = cohere.Client(api_key)
-    resp = client.embed([text])
-    return resp.embeddings[0]
+    resp = client.embed(texts)
+    return resp.embeddings
 
 
-_MODEL_MAP = {
-    "sbert": _sbert_embed,
-    "sentence": _sbert_embed,
-    "openai": _openai_embed,
-    "cohere": _cohere_embed,
+# Built-in providers, each embedding a list of texts per call.
+_BATCH_MODEL_MAP = {
+    "sbert": _sbert_embed_batch,
+    "sentence": _sbert_embed_batch,
+    "openai": _openai_embed_batch,
+    "cohere": _cohere_embed_batch,
 }
 
+# Extension point for additional models that embed one text at a time. A
+# model found in neither map is embedded with SBERT.
+_MODEL_MAP: Dict[str, Callable[[str], List[float]]] = {}
+
+
+def _embed_texts(model_name: str, texts: List[str]) -> List[List[float]]:
+    """Return embeddings for ``texts`` using ``model_name``.
+
+    Batch providers are called with at most ``EMBED_BATCH_SIZE`` texts per
+    request, capped by the provider's own limit, and the vectors are joined
+    back in input order. Models registered in ``_MODEL_MAP`` are called once
+    per text.
+    """
+
+    batch_fn = _BATCH_MODEL_MAP.get(model_name)
+    if batch_fn is None:
+        embed_fn = _MODEL_MAP.get(model_name)
+        if embed_fn is not None:
+            return [embed_fn(text) for text in texts]
+        batch_fn = _sbert_embed_batch
+    size = min(EMBED_BATCH_SIZE, _PROVIDER_BATCH_LIMITS.get(model_name, EMBED_BATCH_SIZE))
+    vectors: List[List[float]] = []
+    for start in range(0, len(texts), size):
+        vectors.extend(batch_fn(texts[start:start + size]))
+    return vectors
+
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Triggered by the ingestion workflow to embed text chunks.
 
     1. Selects an embedding model based on document type or configuration.
-    2. Generates embeddings for each chunk and preserves any metadata.
+    2. Generates embeddings for the chunks, batching those that share a
+       model, and preserves any metadata.
 
     Returns the list of embeddings and corresponding metadata.
     """
@@ -121,9 +168,10 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     except json.JSONDecodeError:
         embed_model_map = DEFAULT_EMBED_MODEL_MAP
 
-    embeddings: List[List[float]] = []
+    texts: List[str] = []
     metadatas: List[Any] = []
-    for chunk in chunks:
+    groups: Dict[str, List[int]] = {}
+    for idx, chunk in enumerate(chunks):
         text = chunk
         meta = None
         c_type = doc_type
@@ -138,15 +186,18 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             meta = dict(meta or {})
             meta.setdefault("file_name", file_name)
         model_name = embed_model_map.get(c_type, embed_model)
-        embed_fn = _MODEL_MAP.get(model_name, _sbert_embed)
+        groups.setdefault(model_name, []).append(idx)
+        texts.append(text)
+        metadatas.append(meta)
+
+    embeddings: List[Any] = [None] * len(texts)
+    for model_name, indices in groups.items():
         try:
-            embedding = embed_fn(text)
+            vectors = _embed_texts(model_name, [texts[i] for i in indices])
         except Exception as exc:  # pragma: no cover - dependency failures
             logger.exception("Embedding using model %s failed", model_name)
             return {"error": str(exc)}
-
-        embeddings.append(embedding)
-        metadatas.append(meta)
+        for i, vector in zip(indices, vectors):
+            embeddings[i] = vector
 
     return {"embeddings": embeddings, "metadatas": metadatas}
-
@@ -3,14 +3,14 @@
 from __future__ import annotations
 
 import os
+import re
+import heapq
+import hashlib
 import logging
+import time
+from collections import OrderedDict
 from common_utils import configure_logger
-try:  # pragma: no cover - optional dependency
-    from httpx import HTTPError
-except Exception:  # pragma: no cover - allow import without httpx
-    class HTTPError(Exception):
-        pass
-from typing import Any, Dict, List, Callable
+from typing import Any, Dict, List, Callable, Tuple
 from pydantic import BaseModel, ValidationError
 import json
 
@@ -19,7 +19,7 @@ from common_utils.get_secret import get_secret
 
 # Module Metadata
 __author__ = "Koushik Sinha"
-__version__ = "1.0.0"
+__version__ = "1.0.3"
 __modified_by__ = "Koushik Sinha"
 
 logger = configure_logger(__name__)
@@ -37,7 +37,31 @@ DEFAULT_PROVIDER = (
     get_config("RERANK_PROVIDER") or os.environ.get("RERANK_PROVIDER", "huggingface")
 )
 
+# Scores for recent (provider, query, documents) requests so bursts of
+# identical queries on a warm container skip the scorer. Set
+# RERANK_CACHE_SIZE to 0 to disable.
+CACHE_SIZE = int(
+    get_config("RERANK_CACHE_SIZE") or os.environ.get("RERANK_CACHE_SIZE", "256")
+)
+CACHE_TTL = float(
+    get_config("RERANK_CACHE_TTL") or os.environ.get("RERANK_CACHE_TTL", "300")
+)
+
+# Queries that name a file, a quoted phrase or a GUID are exact lookups; the
+# vector search order is kept for them instead of running the scorer. Only
+# document extensions the ingestion pipeline handles count as filenames, so
+# dotted terms such as "Node.js" or "3.14" are still reranked.
+_FILENAME_RE = re.compile(
+    r"[\w.-]+\.(?:pdf|docx?|pptx?|xlsx?|csv|txt|md|json|html?|xml|eml|msg|zip"
+    r"|png|jpe?g|tiff?|ipynb)",
+    re.IGNORECASE,
+)
+_GUID_RE = re.compile(
+    r"[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}"
+)
+
 _CE_MODEL = None
+_SCORE_CACHE: OrderedDict[bytes, Tuple[float, List[float]]] = OrderedDict()
 
 
 class RerankEvent(BaseModel):
@@ -54,15 +78,11 @@ def _hf_score_pairs(query: str, docs: List[str]) -> List[float]:
 
     model = _load_model()
     if model is None:
-        return [0.0] * len(docs)
-    try:
-        scores = model.predict([(query, d) for d in docs])
-        if hasattr(scores, "tolist"):
-            scores = scores.tolist()
-        return [float(s) for s in scores]
-    except Exception:  # pragma: no cover - fallback when prediction fails
-        logger.exception("Cross encoder prediction failed")
-        return [0.0] * len(docs)
+        raise RuntimeError("Cross encoder model is not available")
+    scores = model.predict([(query, d) for d in docs])
+    if hasattr(scores, "tolist"):
+        scores = scores.tolist()
+    return [float(s) for s in scores]
 
 
 def _cohere_rerank(query: str, docs: List[str]) -> List[float]:
@@ -75,12 +95,8 @@ def _cohere_rerank(query: str, docs: List[str]) -> List[float]:
     )
     api_key = get_secret(secret)
     client = cohere.Client(api_key)
-    try:
-        resp = client.rerank(query=query, documents=docs, top_n=len(docs))
-        return [float(r.relevance_score) for r in resp]
-    except Exception:  # pragma: no cover - network or dependency issues
-        logger.exception("Cohere rerank failed")
-        return [0.0] * len(docs)
+    resp = client.rerank(query=query, documents=docs, top_n=len(docs))
+    return [float(r.relevance_score) for r in resp]
 
 
 def _nvidia_rerank(query: str, docs: List[str]) -> List[float]:
@@ -97,14 +113,10 @@ def _nvidia_rerank(query: str, docs: List[str]) -> List[float]:
     api_key = get_secret(n_secret)
     headers = {"Authorization": f"Bearer {api_key}"} if api_key else None
     payload = {"query": query, "documents": docs}
-    try:
-        resp = httpx.post(endpoint, json=payload, headers=headers)
-        resp.raise_for_status()
-        data = resp.json()
-        return [float(s) for s in data.get("scores", [])]
-    except HTTPError:  # pragma: no cover - network or dependency issues
-        logger.exception("NVIDIA rerank failed")
-        return [0.0] * len(docs)
+    resp = httpx.post(endpoint, json=payload, headers=headers)
+    resp.raise_for_status()
+    data = resp.json()
+    return [float(s) for s in data.get("scores", [])]
 
 
 def _load_model():
@@ -146,17 +158,70 @@ _PROVIDER_MAP: Dict[str, Callable[[str, List[str]], List[float]]] = {
 
 
 def _score_pairs(query: str, docs: List[str]) -> List[float]:
-    """Score each document for *query* using the selected rerank provider."""
+    """Score each document for *query* using the selected rerank provider.
+
+    Provider errors propagate so that :func:`_cached_scores` can fall back
+    without caching the failure.
+    """
 
     provider = DEFAULT_PROVIDER.lower()
     score_fn = _PROVIDER_MAP.get(provider, _hf_score_pairs)
     return score_fn(query, docs)
 
 
+def _is_literal(query: str) -> bool:
+    """Return ``True`` when *query* is an exact filename, quoted phrase or GUID."""
+
+    q = query.strip()
+    if len(q) >= 2 and q[0] == q[-1] == '"':
+        return True
+    return bool(_FILENAME_RE.fullmatch(q) or _GUID_RE.fullmatch(q))
+
+
+def _cache_key(query: str, docs: List[str]) -> bytes:
+    """Return a digest identifying a scoring request."""
+
+    h = hashlib.blake2b(digest_size=16)
+    for part in (DEFAULT_PROVIDER.lower(), query, *docs):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.digest()
+
+
+def _cached_scores(query: str, docs: List[str]) -> List[float]:
+    """Return :func:`_score_pairs` results, reusing recent identical requests.
+
+    When scoring fails every document gets ``0.0`` and nothing is cached, so
+    the next request retries the provider.
+    """
+
+    if CACHE_SIZE > 0:
+        key = _cache_key(query, docs)
+        now = time.monotonic()
+        hit = _SCORE_CACHE.get(key)
+        if hit is not None and now - hit[0] < CACHE_TTL:
+            _SCORE_CACHE.move_to_end(key)
+            return list(hit[1])
+    try:
+        scores = _score_pairs(query, docs)
+    except Exception:
+        logger.exception("Rerank scoring failed; keeping vector search order")
+        return [0.0] * len(docs)
+    if CACHE_SIZE <= 0:
+        return scores
+    _SCORE_CACHE[key] = (now, list(scores))
+    _SCORE_CACHE.move_to_end(key)
+    while len(_SCORE_CACHE) > CACHE_SIZE:
+        _SCORE_CACHE.popitem(last=False)
+    return scores
+
+
 def _process_event(event: RerankEvent) -> Dict[str, Any]:
     """Re-rank vector search results.
 
     1. Scores each match against the query using the configured rerank provider.
+       Literal queries (filenames, quoted phrases, GUIDs) skip scoring and
+       their matches carry a ``rerank_score`` of ``None``.
     2. Sorts the matches by score and trims the list to ``top_k`` entries.
 
     Returns the re-ranked matches in descending order.
@@ -166,15 +231,15 @@ def _process_event(event: RerankEvent) -> Dict[str, Any]:
     matches: List[Dict[str, Any]] = event.matches
     top_k = int(event.top_k)
     logger.info("Re-ranking %d matches with top_k=%s", len(matches), top_k)
+    if query and _is_literal(query):
+        logger.info("Literal query; keeping vector search order")
+        return {"matches": [{**m, "rerank_score": None} for m in matches[:top_k]]}
     texts = [m.get("metadata", {}).get("text", "") for m in matches]
-    scores = _score_pairs(query, texts) if query else [0.0] * len(matches)
-    reranked = [
-        {**m, "rerank_score": scores[i] if i < len(scores) else 0.0}
-        for i, m in enumerate(matches)
-    ]
-    reranked.sort(key=lambda x: x.get("rerank_score", 0.0), reverse=True)
-    logger.info("Returning %d re-ranked matches", min(len(reranked), top_k))
-    return {"matches": reranked[:top_k]}
+    scores = _cached_scores(query, texts) if query else [0.0] * len(matches)
+    scores = list(scores[: len(matches)]) + [0.0] * (len(matches) - len(scores))
+    best = heapq.nlargest(top_k, range(len(matches)), key=scores.__getitem__)
+    logger.info("Returning %d re-ranked matches", len(best))
+    return {"matches": [{**matches[i], "rerank_score": scores[i]} for i in best]}
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Any:
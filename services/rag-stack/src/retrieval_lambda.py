@@ -18,8 +18,10 @@ from common_utils.error_utils import log_exception
 import boto3
 from routellm_integration import forward_to_routellm
 import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from typing import Any, Dict
+from typing import Any, Dict, List
 from pydantic import BaseModel, ValidationError
 
 from common_utils.get_ssm import get_config
@@ -27,7 +29,7 @@ from common_utils.get_secret import get_secret
 
 # Module Metadata
 __author__ = "Koushik Sinha"
-__version__ = "1.0.0"
+__version__ = "1.0.3"
 __modified_by__ = "Koushik Sinha"
 
 logger = configure_logger(__name__)
@@ -40,10 +42,21 @@ SEARCH_CANDIDATES = int(
 )
 SUMMARY_ENDPOINT = get_config("SUMMARY_ENDPOINT") or os.environ.get("SUMMARY_ENDPOINT")
 ROUTELLM_ENDPOINT = get_config("ROUTELLM_ENDPOINT") or os.environ.get("ROUTELLM_ENDPOINT")
+# Upper bound on SQS records processed concurrently within one invocation.
+MAX_WORKERS = int(
+    get_config("RETRIEVAL_MAX_WORKERS")
+    or os.environ.get("RETRIEVAL_MAX_WORKERS", "8")
+)
 
 lambda_client = boto3.client("lambda")
 
 
+def _encode_payload(payload: Dict[str, Any]) -> bytes:
+    """Serialize ``payload`` as compact JSON for ``lambda_client.invoke``."""
+
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
 class RetrievalEvent(BaseModel):
     collection_name: str
     query: str | None = None
@@ -62,13 +75,20 @@ DEFAULT_EMBED_MODEL = (
 )
 
 _SBERT_MODEL = None
+# SQS records are processed on a thread pool; only one thread may download
+# and load the model on a cold start.
+_SBERT_LOCK = threading.Lock()
 
 
-def _sbert_embed(text: str) -> list[float]:
-    """Embed ``text`` using a SentenceTransformer model."""
+def _load_sbert_model():
+    """Return the cached SentenceTransformer model, loading it on first use."""
 
     global _SBERT_MODEL
-    if _SBERT_MODEL is None:
+    if _SBERT_MODEL is not None:
+        return _SBERT_MODEL
+    with _SBERT_LOCK:
+        if _SBERT_MODEL is not None:
+            return _SBERT_MODEL
         model_path = (
             get_config("SBERT_MODEL")
             or os.environ.get("SBERT_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
@@ -91,7 +111,13 @@ def _sbert_embed(text: str) -> list[float]:
 
         _SBERT_MODEL = SentenceTransformer(model_path)
 
-    return _SBERT_MODEL.encode([text])[0].tolist()
+    return _SBERT_MODEL
+
+
+def _sbert_embed(text: str) -> list[float]:
+    """Embed ``text`` using a SentenceTransformer model."""
+
+    return _load_sbert_model().encode([text])[0].tolist()
 
 
 def _openai_embed(text: str) -> list[float]:
@@ -184,7 +210,7 @@ def _process_event(event: RetrievalEvent) -> Dict[str, Any]:
     try:
         resp = lambda_client.invoke(
             FunctionName=LAMBDA_FUNCTION,
-            Payload=json.dumps(search_payload).encode("utf-8"),
+            Payload=_encode_payload(search_payload),
         )
         result = json.loads(resp["Payload"].read())
     except Exception as exc:
@@ -198,7 +224,7 @@ def _process_event(event: RetrievalEvent) -> Dict[str, Any]:
         try:
             rresp = lambda_client.invoke(
                 FunctionName=RERANK_FUNCTION,
-                Payload=json.dumps(rerank_payload).encode("utf-8"),
+                Payload=_encode_payload(rerank_payload),
             )
             matches = json.loads(rresp["Payload"].read()).get("matches", matches)
         except Exception as exc:
@@ -226,7 +252,8 @@ def _process_event(event: RetrievalEvent) -> Dict[str, Any]:
 def lambda_handler(event: Dict[str, Any], context: Any) -> Any:
     """Entry point handling both direct and SQS invocations."""
     if "Records" in event:
-        results = []
+        results: List[Any] = []
+        pending: Dict[int, RetrievalEvent] = {}
         for r in event["Records"]:
             try:
                 ev = RetrievalEvent.parse_obj(json.loads(r.get("body", "{}")))
@@ -234,7 +261,18 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Any:
                 log_exception("Invalid event", exc, logger)
                 results.append({"result": {}})
             else:
-                results.append(_process_event(ev))
+                pending[len(results)] = ev
+                results.append(None)
+        if len(pending) == 1 or MAX_WORKERS <= 1:
+            for idx, ev in pending.items():
+                results[idx] = _process_event(ev)
+        elif pending:
+            # each record waits on Lambda invokes and the router, so run them
+            # concurrently; boto3 clients are safe to share across threads
+            workers = min(len(pending), MAX_WORKERS)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for idx, res in zip(pending, pool.map(_process_event, pending.values())):
+                    results[idx] = res
         return results
     try:
         ev = RetrievalEvent.parse_obj(event)
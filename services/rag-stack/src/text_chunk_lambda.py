@@ -19,7 +19,7 @@ from common_utils import extract_entities
 
 # Module Metadata
 __author__ = "Koushik Sinha"
-__version__ = "1.0.0"
+__version__ = "1.0.1"
 __modified_by__ = "Koushik Sinha"
 
 logger = configure_logger(__name__)
@@ -51,6 +51,38 @@ EXTRACT_ENTITIES = (
     get_config("EXTRACT_ENTITIES") or os.environ.get("EXTRACT_ENTITIES", "false")
 ).lower() == "true"
 
+# HASH_ALGO selects the content fingerprint stored as ``hash_key``. ``sha256``
+# stays the default so keys match chunks already in the vector store; new
+# collections can use the faster ``blake2b`` or, when ``xxhash`` is
+# installed, ``xxh3``.
+HASH_ALGO = (get_config("HASH_ALGO") or os.environ.get("HASH_ALGO", "sha256")).lower()
+
+
+def _sha256_hex(data: bytes) -> str:
+    """Return the SHA-256 hex digest of ``data``."""
+
+    return hashlib.sha256(data).hexdigest()
+
+
+def _blake2b_hex(data: bytes) -> str:
+    """Return a 256-bit BLAKE2b hex digest of ``data``."""
+
+    return hashlib.blake2b(data, digest_size=32).hexdigest()
+
+
+_HASHERS = {"sha256": _sha256_hex, "blake2b": _blake2b_hex}
+try:  # pragma: no cover - optional dependency
+    import xxhash
+
+    _HASHERS["xxh3"] = xxhash.xxh3_128_hexdigest
+except ImportError:  # pragma: no cover - xxh3 unavailable without xxhash
+    pass
+
+if HASH_ALGO not in _HASHERS:
+    logger.error("Unsupported HASH_ALGO %s - using sha256", HASH_ALGO)
+    HASH_ALGO = "sha256"
+_hash_text = _HASHERS[HASH_ALGO]
+
 
 def _iter_paragraphs(text: str) -> Iterable[str]:
     """Yield paragraphs from ``text`` one at a time."""
@@ -172,8 +204,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             meta["file_guid"] = file_guid
         if file_name:
             meta["file_name"] = file_name
-        hash_key = hashlib.sha256(c.encode("utf-8")).hexdigest()
-        meta["hash_key"] = hash_key
+        meta["hash_key"] = _hash_text(c.encode("utf-8"))
         chunk_list.append({"text": c, "metadata": meta})
     if EXTRACT_ENTITIES:
         for idx, chunk in enumerate(chunk_list):
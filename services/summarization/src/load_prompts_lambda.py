@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 import httpx
 try:  # pragma: no cover - optional dependency
     from httpx import HTTPError
@@ -23,30 +24,39 @@ SYSTEM_WORKFLOW_ID = get_config("SYSTEM_WORKFLOW_ID") or os.environ.get(
 )
 
 
+def _fetch_prompts(workflow_id: str) -> list:
+    """Return the prompt engine response for ``workflow_id``."""
+
+    resp = httpx.post(PROMPT_ENGINE_ENDPOINT, json={"workflow_id": workflow_id})
+    resp.raise_for_status()
+    return resp.json()
+
+
 def lambda_handler(event: dict, context: object) -> dict:
     workflow_id = event.get("workflow_id")
     if not PROMPT_ENGINE_ENDPOINT or not workflow_id:
         return {"prompts": [], "llm_params": {}}
 
+    # the workflow and system prompts are independent, so fetch both at once
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        prompts_future = pool.submit(_fetch_prompts, workflow_id)
+        sys_future = (
+            pool.submit(_fetch_prompts, SYSTEM_WORKFLOW_ID) if SYSTEM_WORKFLOW_ID else None
+        )
+
     try:
-        resp = httpx.post(PROMPT_ENGINE_ENDPOINT, json={"workflow_id": workflow_id})
-        resp.raise_for_status()
+        prompts = prompts_future.result()
     except HTTPError as exc:
         logger.exception("Failed to fetch workflow prompts")
         return {"prompts": [], "error": str(exc)}
-    prompts = resp.json()
 
     sys_prompt = None
-    if SYSTEM_WORKFLOW_ID:
+    if sys_future is not None:
         try:
-            sresp = httpx.post(
-                PROMPT_ENGINE_ENDPOINT, json={"workflow_id": SYSTEM_WORKFLOW_ID}
-            )
-            sresp.raise_for_status()
+            data = sys_future.result()
         except HTTPError as exc:
             logger.exception("Failed to fetch system prompt")
             return {"prompts": [], "error": str(exc)}
-        data = sresp.json()
         if data:
             sys_prompt = data[0].get("template")
 
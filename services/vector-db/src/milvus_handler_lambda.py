@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import logging
 import os
-from typing import Any, Dict, Iterable, List
+from typing import Any, Callable, Dict, Iterable, List
 
 from common_utils import configure_logger, MilvusClient, VectorItem
 from common_utils.get_ssm import get_config
@@ -12,6 +12,7 @@ from common_utils.get_ssm import get_config
 logger = configure_logger(__name__)
 
 DEFAULT_TOP_K = int(get_config("TOP_K") or os.environ.get("TOP_K", "5"))
+_FILTER_KEYS = ("department", "team", "user", "file_guid", "file_name")
 
 client = MilvusClient()
 
@@ -125,35 +126,33 @@ def _search(event: Dict[str, Any]) -> Dict[str, Any]:
         return {"matches": []}
 
     matches = [{"id": r.id, "score": r.score, "metadata": r.metadata} for r in results]
-    department = event.get("department")
-    team = event.get("team")
-    user = event.get("user")
-    entities: List[str] | None = event.get("entities")
-    file_guid = event.get("file_guid")
-    file_name = event.get("file_name")
-    if department or team or user or entities or file_guid or file_name:
-        filtered = []
-        for m in matches:
-            md = m.get("metadata", {}) or {}
-            if department and md.get("department") != department:
-                continue
-            if team and md.get("team") != team:
-                continue
-            if user and md.get("user") != user:
-                continue
-            if entities:
-                chunk_ents = md.get("entities", []) or []
-                if not any(e in chunk_ents for e in entities):
-                    continue
-            if file_guid and md.get("file_guid") != file_guid:
-                continue
-            if file_name and md.get("file_name") != file_name:
-                continue
-            filtered.append(m)
-        matches = filtered
+    keep = _match_filter(event)
+    if keep is not None:
+        matches = [m for m in matches if keep(m.get("metadata") or {})]
     return {"matches": matches}
 
 
+def _match_filter(event: Dict[str, Any]) -> Callable[[Dict[str, Any]], bool] | None:
+    """Build a metadata predicate from the event's filter fields.
+
+    Returns ``None`` when the event has no filters. Scalar fields must match
+    exactly; ``entities`` matches when any requested entity is present.
+    """
+
+    wanted = [(k, event[k]) for k in _FILTER_KEYS if event.get(k)]
+    entities = frozenset(event.get("entities") or ())
+    if not wanted and not entities:
+        return None
+
+    def keep(md: Dict[str, Any]) -> bool:
+        for key, value in wanted:
+            if md.get(key) != value:
+                return False
+        return not entities or not entities.isdisjoint(md.get("entities") or ())
+
+    return keep
+
+
 def _hybrid_search(event: Dict[str, Any]) -> Dict[str, Any]:
     embedding = event.get("embedding")
     keywords: List[str] = event.get("keywords", [])
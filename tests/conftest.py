@@ -1,5 +1,12 @@
 import pytest
+import collections.abc
+import functools
+import hashlib
+import importlib.util
 import io
+import json
+import os
+import textwrap
 import types
 import sys
 try:
@@ -9,7 +16,55 @@ except ModuleNotFoundError:  # pragma: no cover - fallback for minimal env
     boto3.client = lambda *a, **k: None
     sys.modules['boto3'] = boto3
 
+# Real fpdf installs are used as-is; otherwise a minimal package is written to
+# FPDF_INIT so tests that need a file-backed fpdf can load it.
+_REAL_FPDF_SPEC = importlib.util.find_spec("fpdf")
+FPDF_INIT = (
+    _REAL_FPDF_SPEC.origin
+    if _REAL_FPDF_SPEC is not None
+    else "/root/.pyenv/versions/3.12.10/lib/python3.12/site-packages/fpdf/__init__.py"
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_source(path, mtime):
+    with open(path) as fh:
+        return compile(fh.read(), path, "exec")
+
+
+def load_lambda(name, path):
+    """Execute the source at *path* as a fresh module named *name*.
+
+    The compiled code is cached per resolved ``(path, mtime)`` so repeated
+    loads under any alias only re-run the module body. Re-running it keeps
+    import-time configuration reads and module-level maps such as
+    ``_MODEL_MAP`` private to each test.
+    """
+    source = os.path.realpath(path)
+    module = types.ModuleType(name)
+    module.__file__ = path
+    exec(_compile_source(source, os.path.getmtime(source)), module.__dict__)
+    return module
+
+
+class S3ClientError(Exception):
+    def __init__(self, response, op):
+        super().__init__("client error")
+        self.response = response
+        self.operation_name = op
+
+
+@functools.lru_cache(maxsize=256)
+def _etag(data):
+    """Return the quoted MD5 ETag for *data*, cached by content."""
+    return '"' + hashlib.md5(data).hexdigest() + '"'
+
+
 class DummyS3:
+    __slots__ = ("objects", "tags", "last_modified")
+
+    exceptions = types.SimpleNamespace(ClientError=S3ClientError)
+
     def __init__(self):
         self.objects = {}
         self.tags = {}
@@ -34,10 +89,8 @@ class DummyS3:
     def head_object(self, Bucket, Key):
         if (Bucket, Key) not in self.objects:
             raise self.exceptions.ClientError({"Error": {"Code": "404"}}, "head_object")
-        import hashlib
         data = self.objects[(Bucket, Key)]
-        etag = '"' + hashlib.md5(data).hexdigest() + '"'
-        return {"ETag": etag, "ContentLength": len(data)}
+        return {"ETag": _etag(data), "ContentLength": len(data)}
 
     def copy_object(self, Bucket=None, Key=None, CopySource=None):
         src = (CopySource["Bucket"], CopySource["Key"])
@@ -74,19 +127,55 @@ class DummyS3:
         ]
         return {"TagSet": tagset}
 
-    class exceptions:
-        class ClientError(Exception):
-            def __init__(self, response, op):
-                super().__init__("client error")
-                self.response = response
-                self.operation_name = op
-
 @pytest.fixture
 def s3_stub(monkeypatch):
     stub = DummyS3()
     monkeypatch.setattr(boto3, "client", lambda name, *a, **k: stub if name == "s3" else None)
     return stub
 
+class FakeSQS:
+    """SQS client stand-in that records each raw message body."""
+
+    __slots__ = ("calls",)
+
+    _RESPONSE = {"MessageId": "1"}
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def send_message(self, QueueUrl=None, MessageBody=None):
+        self.calls.append(MessageBody)
+        return self._RESPONSE
+
+
+class SentMessages(collections.abc.Sequence):
+    """Read-only view of :class:`FakeSQS` bodies, JSON-decoded on access."""
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [json.loads(body) for body in self.raw[index]]
+        return json.loads(self.raw[index])
+
+    def __len__(self):
+        return len(self.raw)
+
+
+@pytest.fixture
+def sqs_calls(monkeypatch):
+    """Route ``boto3.client`` to a :class:`FakeSQS` and return its messages.
+
+    Modules loaded afterwards bind the fake as their import-time SQS client.
+    Bodies are stored as sent and only decoded when a test reads one.
+    """
+    fake = FakeSQS([])
+    monkeypatch.setattr(boto3, "client", lambda name, *a, **k: fake)
+    return SentMessages(fake.calls)
+
 def _stub_module(name, attrs=None):
     mod = types.ModuleType(name)
     for k, v in (attrs or {}).items():
@@ -112,7 +201,7 @@ def external_stubs():
     _stub_module(
         "botocore.exceptions",
         {
-            "ClientError": DummyS3.exceptions.ClientError,
+            "ClientError": S3ClientError,
             "BotoCoreError": Exception,
         },
     )
@@ -148,7 +237,22 @@ def external_stubs():
             self.pages = [DummyPage()]
 
     _stub_module("PyPDF2", {"PdfReader": DummyReader, "PdfWriter": object})
-    _stub_module("httpx", {"post": lambda *a, **k: types.SimpleNamespace(json=lambda: {}, raise_for_status=lambda: None)})
+    class _HttpxClient:
+        # route through the module-level ``post`` so tests can patch one place
+        def __init__(self, *a, **k):
+            pass
+
+        def post(self, *a, **k):
+            return sys.modules["httpx"].post(*a, **k)
+
+    _stub_module(
+        "httpx",
+        {
+            "post": lambda *a, **k: types.SimpleNamespace(json=lambda: {}, raise_for_status=lambda: None),
+            "Client": _HttpxClient,
+            "Limits": lambda **k: None,
+        },
+    )
     _stub_module(
         "ocr_module",
         {
@@ -198,50 +302,6 @@ def external_stubs():
             return b"%PDF-1.4"
 
     _stub_module("fpdf", {"FPDF": FPDF})
-    import os, textwrap
-    fpdf_dir = "/root/.pyenv/versions/3.12.10/lib/python3.12/site-packages/fpdf"
-    os.makedirs(fpdf_dir, exist_ok=True)
-    with open(os.path.join(fpdf_dir, "__init__.py"), "w") as fh:
-        fh.write(textwrap.dedent(
-            """
-            class FPDF:
-                def __init__(self, *a, **k):
-                    self.font_size = 10
-                def set_margins(self, *a):
-                    pass
-                def add_page(self):
-                    pass
-                def set_xy(self, *a):
-                    pass
-                def set_x(self, *a):
-                    pass
-                def get_y(self):
-                    return 0
-                def add_font(self, *a, **k):
-                    pass
-                def set_font(self, *a, **k):
-                    if 'size' in k:
-                        self.font_size = k['size']
-                def multi_cell(self, *a, **k):
-                    pass
-                def ln(self, *a):
-                    pass
-                class _Table:
-                    def __enter__(self):
-                        return self
-                    def __exit__(self, exc_type, exc, tb):
-                        pass
-                    def row(self):
-                        class R:
-                            def cell(self, *a, **k):
-                                pass
-                        return R()
-                def table(self):
-                    return self._Table()
-                def output(self, dest='S'):
-                    return b'%PDF-1.4'
-            """
-        ))
     _stub_module("numpy", {"frombuffer": lambda *a, **k: [], "uint8": int, "reshape": lambda *a, **k: [], "mean": lambda x: 0, "ndarray": object})
     class DummyES:
         def __init__(self, *a, **k):
@@ -286,6 +346,89 @@ def external_stubs():
     yield
 
 
+@pytest.fixture
+def faker_stub(monkeypatch):
+    """Install a deterministic ``faker`` module and return its generator."""
+    class FakeGen:
+        def __init__(self):
+            self.count = 0
+        def name(self):
+            self.count += 1
+            return f"name{self.count}"
+        def company(self):
+            return "company"
+        def city(self):
+            return "city"
+        def address(self):
+            return "addr"
+        def phone_number(self):
+            return "phone"
+        def email(self):
+            return "email"
+        def word(self):
+            return "word"
+    fake = FakeGen()
+    fake_mod = types.SimpleNamespace(Faker=lambda: fake)
+    monkeypatch.setitem(sys.modules, "faker", fake_mod)
+    return fake
+
+
+class _DummyCollection:
+    def __init__(self, *a, **k):
+        pass
+
+    def delete(self, expr):
+        return types.SimpleNamespace(delete_count=2)
+
+    def drop(self):
+        pass
+
+    def create_index(self, *a, **k):
+        pass
+
+
+# shared ``pymilvus`` stand-in; tests install it with ``monkeypatch`` so each
+# one still gets an isolated ``sys.modules`` entry
+_DUMMY_PYMILVUS = types.ModuleType("pymilvus")
+_DUMMY_PYMILVUS.Collection = _DummyCollection
+_DUMMY_PYMILVUS.connections = types.SimpleNamespace(connect=lambda alias, host, port: None)
+_DUMMY_PYMILVUS.DataType = types.SimpleNamespace(INT64=0, FLOAT_VECTOR=1, JSON=2)
+_DUMMY_PYMILVUS.FieldSchema = lambda *a, **k: None
+_DUMMY_PYMILVUS.CollectionSchema = lambda *a, **k: None
+
+
+@pytest.fixture
+def pymilvus_stub(monkeypatch):
+    """Install a minimal ``pymilvus`` so the vector DB handlers can import
+    regardless of test order."""
+    import common_utils.milvus_client as mc
+
+    monkeypatch.setitem(sys.modules, "pymilvus", _DUMMY_PYMILVUS)
+    monkeypatch.setattr(mc, "Collection", _DUMMY_PYMILVUS.Collection, raising=False)
+    monkeypatch.setattr(mc, "connections", _DUMMY_PYMILVUS.connections, raising=False)
+    return _DUMMY_PYMILVUS
+
+
+class _BotocoreClientError(Exception):
+    pass
+
+
+# ``botocore`` stand-in whose ``ClientError`` keeps the error response in its
+# message; built once and installed per test like the pymilvus stub
+_DUMMY_BOTOCORE_EXC = types.ModuleType("botocore.exceptions")
+_DUMMY_BOTOCORE_EXC.ClientError = _BotocoreClientError
+_DUMMY_BOTOCORE = types.ModuleType("botocore")
+_DUMMY_BOTOCORE.exceptions = _DUMMY_BOTOCORE_EXC
+
+
+@pytest.fixture
+def botocore_stub(monkeypatch):
+    """Install the shared ``botocore`` stub and return its ``ClientError``."""
+    monkeypatch.setitem(sys.modules, "botocore", _DUMMY_BOTOCORE)
+    monkeypatch.setitem(sys.modules, "botocore.exceptions", _DUMMY_BOTOCORE_EXC)
+    return _BotocoreClientError
+
+
 @pytest.fixture(autouse=True)
 def router_layer_path():
     import sys, os
@@ -309,8 +452,6 @@ def chunking_layer_path():
 
 @pytest.fixture(autouse=True)
 def common_utils_path():
-    import sys, os
-    sys.path.insert(0, os.path.join(os.getcwd(), 'common/layers/common-utils/python'))
     import importlib, types
     sec = importlib.import_module('common_utils.get_secret')
     sec._SECRET_CACHE.clear()
@@ -319,7 +460,7 @@ def common_utils_path():
     es_mod.Elasticsearch = lambda *a, **k: types.SimpleNamespace(index=lambda **kw: None, delete=lambda **kw: None, search=lambda **kw: {'hits': {'hits': []}}, indices=types.SimpleNamespace(create=lambda **kw: None, delete=lambda **kw: None))
     yield
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def validate_schema():
     def _check(obj):
         assert isinstance(obj, dict)
@@ -330,7 +471,7 @@ def validate_schema():
     return _check
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def validate_pii_schema():
     def _check(obj):
         assert isinstance(obj, dict)
@@ -349,13 +490,98 @@ def validate_pii_schema():
     return _check
 
 
-@pytest.fixture
-def config(monkeypatch, s3_stub):
-    import sys, os
-    sys.path.insert(0, os.path.join(os.getcwd(), 'common/layers/common-utils/python'))
+@pytest.fixture(scope="session")
+def _ssm_module():
     import common_utils.get_ssm as g
-    g._SSM_CACHE.clear()
+    return g
+
+
+@pytest.fixture(scope="session")
+def fpdf_real():
+    """Execute the file-backed ``fpdf`` package at ``FPDF_INIT`` once.
+
+    The autouse stubs replace ``sys.modules["fpdf"]`` for every test, so the
+    module is returned rather than left installed.
+    """
+    if _REAL_FPDF_SPEC is None:
+        os.makedirs(os.path.dirname(FPDF_INIT), exist_ok=True)
+        # write then rename so parallel (xdist) workers never import a
+        # partially written file
+        tmp_path = f"{FPDF_INIT}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as fh:
+            fh.write(textwrap.dedent(
+                """
+                class FPDF:
+                    def __init__(self, *a, **k):
+                        self.font_size = 10
+                    def set_margins(self, *a):
+                        pass
+                    def add_page(self):
+                        pass
+                    def set_xy(self, *a):
+                        pass
+                    def set_x(self, *a):
+                        pass
+                    def get_y(self):
+                        return 0
+                    def add_font(self, *a, **k):
+                        pass
+                    def set_font(self, *a, **k):
+                        if 'size' in k:
+                            self.font_size = k['size']
+                    def multi_cell(self, *a, **k):
+                        pass
+                    def ln(self, *a):
+                        pass
+                    class _Table:
+                        def __enter__(self):
+                            return self
+                        def __exit__(self, exc_type, exc, tb):
+                            pass
+                        def row(self):
+                            class R:
+                                def cell(self, *a, **k):
+                                    pass
+                            return R()
+                    def table(self):
+                        return self._Table()
+                    def output(self, dest='S'):
+                        return b'%PDF-1.4'
+                """
+            ))
+        os.replace(tmp_path, FPDF_INIT)
+    spec = importlib.util.spec_from_file_location(
+        "fpdf", FPDF_INIT, submodule_search_locations=[os.path.dirname(FPDF_INIT)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    previous = sys.modules.pop("fpdf", None)
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        if previous is not None:
+            sys.modules["fpdf"] = previous
+    return module
+
+
+@pytest.fixture(scope="session")
+def pdf_helper_module(fpdf_real, _ssm_module):
+    """``file_summary_lambda`` executed once against the file-backed fpdf."""
+    previous = sys.modules.get("fpdf")
+    sys.modules["fpdf"] = fpdf_real
+    try:
+        module = load_lambda("pdf", "services/summarization/src/file_summary_lambda.py")
+    finally:
+        if previous is None:
+            sys.modules.pop("fpdf", None)
+        else:
+            sys.modules["fpdf"] = previous
+    return module
+
+
+@pytest.fixture
+def config(monkeypatch, s3_stub, _ssm_module):
+    _ssm_module._SSM_CACHE.clear()
     params = {}
-    monkeypatch.setattr(g, "s3_client", s3_stub)
-    monkeypatch.setattr(g, "get_values_from_ssm", lambda name, decrypt=False: params.get(name))
+    monkeypatch.setattr(_ssm_module, "s3_client", s3_stub)
+    monkeypatch.setattr(_ssm_module, "get_values_from_ssm", lambda name, decrypt=False: params.get(name))
     return params
@@ -1,5 +1,7 @@
 import importlib.util
 
+import pytest
+
 
 def load_lambda(name, path):
     spec = importlib.util.spec_from_file_location(name, path)
@@ -8,8 +10,12 @@ def load_lambda(name, path):
     return module
 
 
-def test_generate_acord_xml():
-    module = load_lambda('acord', 'services/acord-generator/src/generate_xml_lambda.py')
+@pytest.fixture(scope='module')
+def module():
+    return load_lambda('acord', 'services/acord-generator/src/generate_xml_lambda.py')
+
+
+def test_generate_acord_xml(module):
     data = {
         'fields': {'PolNumber': 'PN123', 'InsuredName': 'Jane Doe'},
         'signatures': {'Insured': 'Jane Doe', 'DateSigned': '2024-01-01'},
@@ -21,34 +27,30 @@ def test_generate_acord_xml():
     assert '<DateSigned>2024-01-01</DateSigned>' in xml
 
 
-def test_verify_signature_heuristic(monkeypatch):
-    module = load_lambda('acord', 'services/acord-generator/src/generate_xml_lambda.py')
-
-    class DummyImg:
-        def convert(self, mode):
-            return self
-        def histogram(self):
-            return [10]*50 + [0]*206
-        def __enter__(self):
-            return self
-        def __exit__(self, exc_type, exc, tb):
-            pass
+class DummyImg:
+    def convert(self, mode):
+        return self
+    def histogram(self):
+        return [10]*50 + [0]*206
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc, tb):
+        pass
 
-    monkeypatch.setattr(module, 'Image', type('I', (), {'open': lambda *a, **k: DummyImg()}))
-    monkeypatch.setattr(module, 'SIGNATURE_MODEL_ENDPOINT', None, raising=False)
-    monkeypatch.setattr(module, 'SIGNATURE_THRESHOLD', 0.05, raising=False)
-
-    assert module.verify_signature(b'data') is True
 
+def post(url, files=None):
+    return type('R', (), {'json': lambda self=None: {'score': 0.9}, 'raise_for_status': lambda self: None})()
 
-def test_verify_signature_remote(monkeypatch):
-    module = load_lambda('acord', 'services/acord-generator/src/generate_xml_lambda.py')
-
-    def post(url, files=None):
-        return type('R', (), {'json': lambda self=None: {'score': 0.9}, 'raise_for_status': lambda self: None})()
 
+@pytest.mark.parametrize(
+    'endpoint,threshold,expected',
+    [(None, 0.05, True), ('http://model', 0.8, True)],
+    ids=['heuristic', 'remote'],
+)
+def test_verify_signature(monkeypatch, module, endpoint, threshold, expected):
+    monkeypatch.setattr(module, 'Image', type('I', (), {'open': lambda *a, **k: DummyImg()}))
     monkeypatch.setattr(module, 'httpx', type('H', (), {'post': post}))
-    monkeypatch.setattr(module, 'SIGNATURE_MODEL_ENDPOINT', 'http://model')
-    monkeypatch.setattr(module, 'SIGNATURE_THRESHOLD', 0.8, raising=False)
+    monkeypatch.setattr(module, 'SIGNATURE_MODEL_ENDPOINT', endpoint, raising=False)
+    monkeypatch.setattr(module, 'SIGNATURE_THRESHOLD', threshold, raising=False)
 
-    assert module.verify_signature(b'data') is True
+    assert module.verify_signature(b'data') is expected
@@ -0,0 +1,48 @@
+import io
+import json
+import types
+import pytest
+from conftest import load_lambda
+
+pytest.importorskip("pytest_benchmark")
+
+_ENV = "/parameters/aio/ameritasAI/SERVER_ENV"
+_MATCHES = [{"id": i, "metadata": {"text": f"text {i}"}} for i in range(100)]
+
+
+def test_bench_rerank(benchmark, monkeypatch, config):
+    config[_ENV] = "dev"
+    module = load_lambda("bench_rerank", "services/rag-stack/src/rerank_lambda.py")
+    monkeypatch.setattr(module, "CACHE_SIZE", 0)
+    monkeypatch.setattr(module, "_score_pairs", lambda q, d: [len(t) / 10 for t in d])
+    event = {"query": "x", "matches": _MATCHES, "top_k": 10}
+    out = benchmark(module.lambda_handler, event, {})
+    assert len(out["matches"]) == 10
+
+
+def test_bench_embed(benchmark, monkeypatch, config):
+    config[_ENV] = "dev"
+    module = load_lambda("bench_embed", "services/rag-stack/src/embed_lambda.py")
+    monkeypatch.setitem(module._BATCH_MODEL_MAP, "sbert", lambda ts: [[0.0] * 384 for _ in ts])
+    chunks = [{"text": m["metadata"]["text"], "metadata": {}} for m in _MATCHES]
+    event = {"chunks": chunks, "embedModel": "sbert", "file_guid": "g"}
+    out = benchmark(module.lambda_handler, event, {})
+    assert len(out["embeddings"]) == len(chunks)
+
+
+def test_bench_retrieval(benchmark, monkeypatch, config):
+    config[_ENV] = "dev"
+    config["/parameters/aio/ameritasAI/dev/VECTOR_SEARCH_FUNCTION"] = "vector-search"
+    module = load_lambda("bench_retrieval", "services/rag-stack/src/retrieval_lambda.py")
+    body = json.dumps({"matches": _MATCHES}).encode("utf-8")
+
+    def fake_invoke(FunctionName=None, Payload=None):
+        return {"Payload": io.BytesIO(body)}
+
+    monkeypatch.setattr(
+        module, "lambda_client", types.SimpleNamespace(invoke=fake_invoke)
+    )
+    monkeypatch.setattr(module, "forward_to_routellm", lambda payload: {"text": "ok"})
+    event = {"collection_name": "c", "query": "q", "embedding": [0.1] * 384}
+    out = benchmark(module.lambda_handler, event, {})
+    assert out["result"] == {"text": "ok"}
@@ -8,13 +8,17 @@ def load_lambda(name, path):
     return module
 
 
+def _assert_not_called(*a, **k):
+    raise AssertionError('merge called')
+
+
 def test_assemble_skips_merge(monkeypatch, s3_stub, config):
     module = load_lambda('assemble', 'services/file-assembly/src/file_assembly_lambda.py')
 
     s3_stub.objects[('bucket', 'extracted/test.docx')] = b'orig'
     s3_stub.objects[('bucket', 'summary/test.pdf')] = b'sum'
 
-    monkeypatch.setattr(module, 'merge_pdfs', lambda *a, **k: (_ for _ in ()).throw(AssertionError('merge called')))
+    monkeypatch.setattr(module, 'merge_pdfs', _assert_not_called)
 
     uploaded = {}
 
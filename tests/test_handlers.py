@@ -1,24 +1,18 @@
+import functools
+import hashlib
 import json
-import importlib.util
 import importlib
-import os
 import io
 import sys
+import threading
+import time
+import types
+from unittest import mock
 import pytest
-sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'common', 'layers', 'common-utils', 'python'))
-VECTOR_SRC = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'services', 'vector-db', 'src')
-sys.path.insert(0, VECTOR_SRC)
-sys.path.insert(0, os.path.join(VECTOR_SRC, 'proxy'))
 from models import FileProcessingEvent, ProcessingStatusEvent
 from services.summarization.models import SummaryEvent
-
-
-def load_lambda(name, path):
-    spec = importlib.util.spec_from_file_location(name, path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
+from common_utils import SearchResult
+from conftest import load_lambda
 
 
 def import_vector_module(name):
@@ -26,23 +20,81 @@ def import_vector_module(name):
     return importlib.reload(importlib.import_module(name))
 
 
-def _make_fake_send(calls):
-    class FakeSQS:
-        def send_message(self, QueueUrl=None, MessageBody=None):
-            calls.append(json.loads(MessageBody))
-            return {"MessageId": "1"}
+_PREFIX = "/parameters/aio/ameritasAI/dev"
 
-    return FakeSQS()
 
+def _cfg(**values):
+    """Return SSM parameters for the ``dev`` environment."""
+    params = {"/parameters/aio/ameritasAI/SERVER_ENV": "dev"}
+    params.update({f"{_PREFIX}/{key}": value for key, value in values.items()})
+    return params
 
-def test_office_extractor(monkeypatch, s3_stub, validate_schema, config):
-    prefix = "/parameters/aio/ameritasAI/dev"
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    config[f"{prefix}/BUCKET_NAME"] = "bucket"
+
+@pytest.fixture
+def idp_config(config):
+    """Preload the ``dev`` IDP bucket and return a setter for further keys."""
+    config.update(_cfg(BUCKET_NAME="bucket"))
+    return lambda **values: config.update(_cfg(**values))
+
+
+_EMPTY_HOCR = b'{"words": []}'
+_PAGE_MD = b"## Page %d\n\ntext\n"
+_OUTPUT_DOC1 = json.dumps(
+    {"documentId": "doc1", "type": "pdf", "pageCount": 1, "pages": ["## Page 1\n\nhi\n"]}
+).encode()
+
+
+@functools.lru_cache(maxsize=None)
+def _manifest_bytes(doc_id, pages):
+    return json.dumps({"documentId": doc_id, "pages": pages}).encode()
+
+
+def _seed_pages(objects, doc_id, n, pdf_page_prefix="pdf-pages/", text_page_prefix="text-pages/"):
+    """Stage the manifest and ``n`` Markdown pages of ``doc_id`` in one update."""
+    items = {("bucket", f"{pdf_page_prefix}{doc_id}/manifest.json"): _manifest_bytes(doc_id, n)}
+    items.update(
+        (("bucket", f"{text_page_prefix}{doc_id}/page_{i:03d}.md"), _PAGE_MD % i)
+        for i in range(1, n + 1)
+    )
+    objects.update(items)
+
+
+def _s3_event(key, **extra):
+    """Return an S3 put notification for ``bucket/key``."""
+    return {
+        **extra,
+        "Records": [{"s3": {"bucket": {"name": "bucket"}, "object": {"key": key}}}],
+    }
+
+
+def _install_ocr_stubs(monkeypatch, module, *, perform_ocr=None, extract=None):
+    """Skip rasterization and replace the OCR step of the PDF OCR extractor."""
+    monkeypatch.setattr(module, "_rasterize_page", lambda b, dpi: object())
+    if perform_ocr:
+        monkeypatch.setattr(module, "_perform_ocr", perform_ocr)
+    if extract:
+        monkeypatch.setattr(module, "_ocr_image", extract)
+
+
+class FakePayload:
+    """Lambda ``invoke`` response body, serialized once at construction."""
+
+    __slots__ = ("_body",)
+
+    def __init__(self, data):
+        self._body = json.dumps(data).encode("utf-8")
+
+    def read(self):
+        return self._body
+
+
+def test_office_extractor(monkeypatch, s3_stub, validate_schema, idp_config):
     office_prefix = "office-docs/"
     text_doc_prefix = "text-docs/"
-    config[f"{prefix}/OFFICE_PREFIX"] = office_prefix
-    config[f"{prefix}/TEXT_DOC_PREFIX"] = text_doc_prefix
+    idp_config(
+        OFFICE_PREFIX=office_prefix,
+        TEXT_DOC_PREFIX=text_doc_prefix,
+    )
     module = load_lambda("office", "services/idp/src/office_extractor_lambda.py")
 
     s3_stub.objects[("bucket", f"{office_prefix}test.docx")] = b"data"
@@ -51,21 +103,11 @@ def test_office_extractor(monkeypatch, s3_stub, validate_schema, config):
     monkeypatch.setattr(module, "_extract_pptx", lambda b: ["## Page 1\n\ntext\n"])
     monkeypatch.setattr(module, "_extract_xlsx", lambda b: ["## Page 1\n\ntext\n"])
 
-    event = {
-        "document_id": "doc123",
-        "Records": [
-            {
-                "s3": {
-                    "bucket": {"name": "bucket"},
-                    "object": {"key": f"{office_prefix}test.docx"},
-                }
-            }
-        ]
-    }
+    event = _s3_event(f"{office_prefix}test.docx", document_id="doc123")
     module.lambda_handler(event, {})
 
     out_key = f"{text_doc_prefix}doc123.json"
-    payload = json.loads(s3_stub.objects[("bucket", out_key)].decode())
+    payload = json.loads(s3_stub.objects[("bucket", out_key)])
     assert payload["documentId"] == "doc123"
     assert payload["pageCount"] == 1
     page = {
@@ -76,255 +118,144 @@ def test_office_extractor(monkeypatch, s3_stub, validate_schema, config):
     validate_schema(page)
 
 
-def test_pdf_text_extractor(monkeypatch, s3_stub, validate_schema, config):
-    prefix = "/parameters/aio/ameritasAI/dev"
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    config[f"{prefix}/BUCKET_NAME"] = "bucket"
+def test_pdf_text_extractor(monkeypatch, s3_stub, validate_schema, idp_config):
     pdf_text_page_prefix = "text-pages/"
     text_page_prefix = "text-pages/"
-    config[f"{prefix}/PDF_TEXT_PAGE_PREFIX"] = pdf_text_page_prefix
-    config[f"{prefix}/TEXT_PAGE_PREFIX"] = text_page_prefix
+    idp_config(
+        PDF_TEXT_PAGE_PREFIX=pdf_text_page_prefix,
+        TEXT_PAGE_PREFIX=text_page_prefix,
+    )
     module = load_lambda("pdf_text", "services/idp/src/pdf_text_extractor_lambda.py")
 
     s3_stub.objects[("bucket", f"{pdf_text_page_prefix}doc1/page_001.pdf")] = b"data"
 
     monkeypatch.setattr(module, "_extract_text", lambda b: "## Page 1\n\nhello\n")
 
-    event = {
-        "Records": [
-            {
-                "s3": {
-                    "bucket": {"name": "bucket"},
-                    "object": {"key": f"{pdf_text_page_prefix}doc1/page_001.pdf"},
-                }
-            }
-        ]
-    }
-    module.lambda_handler(event, {})
-
-    md = s3_stub.objects[("bucket", f"{text_page_prefix}doc1/page_001.md")].decode()
-    schema = {"documentId": "doc1", "pageNumber": 1, "content": md}
-    validate_schema(schema)
-
-
-def test_pdf_ocr_extractor(monkeypatch, s3_stub, validate_schema, config):
-    prefix = "/parameters/aio/ameritasAI/dev"
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    config[f"{prefix}/BUCKET_NAME"] = "bucket"
-    pdf_scan_prefix = "scan-pages/"
-    text_page_prefix = "text-pages/"
-    config[f"{prefix}/PDF_SCAN_PAGE_PREFIX"] = pdf_scan_prefix
-    config[f"{prefix}/TEXT_PAGE_PREFIX"] = text_page_prefix
-    module = load_lambda("ocr", "services/idp/src/pdf_ocr_extractor_lambda.py")
-
-    s3_stub.objects[("bucket", f"{pdf_scan_prefix}doc1/page_001.pdf")] = b"data"
-
-    monkeypatch.setattr(module, "_rasterize_page", lambda b, dpi: object())
-    monkeypatch.setattr(module, "_ocr_image", lambda img, e, t, d: "## Page 1\n\nocr\n")
-
-    event = {
-        "Records": [
-            {
-                "s3": {
-                    "bucket": {"name": "bucket"},
-                    "object": {"key": f"{pdf_scan_prefix}doc1/page_001.pdf"},
-                }
-            }
-        ]
-    }
-    module.lambda_handler(event, {})
-
-    md = s3_stub.objects[("bucket", f"{text_page_prefix}doc1/page_001.md")].decode()
-    schema = {"documentId": "doc1", "pageNumber": 1, "content": md}
-    validate_schema(schema)
-
-
-def test_pdf_ocr_extractor_trocr(monkeypatch, s3_stub, validate_schema, config):
-    prefix = "/parameters/aio/ameritasAI/dev"
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    config[f"{prefix}/BUCKET_NAME"] = "bucket"
-    pdf_scan_prefix = "scan-pages/"
-    text_page_prefix = "text-pages/"
-    config[f"{prefix}/PDF_SCAN_PAGE_PREFIX"] = pdf_scan_prefix
-    config[f"{prefix}/TEXT_PAGE_PREFIX"] = text_page_prefix
-    config[f"{prefix}/OCR_ENGINE"] = "trocr"
-    config[f"{prefix}/TROCR_ENDPOINT"] = "http://example"
-    module = load_lambda("ocr_trocr", "services/idp/src/pdf_ocr_extractor_lambda.py")
-
-    s3_stub.objects[("bucket", f"{pdf_scan_prefix}doc1/page_001.pdf")] = b"data"
-
-    monkeypatch.setattr(module, "_rasterize_page", lambda b, dpi: object())
-    called = {}
-
-    def fake(reader, engine, img):
-        called["engine"] = engine
-        return "ocr", 0.9
-
-    monkeypatch.setattr(module, "_perform_ocr", fake)
-
-    event = {
-        "Records": [
-            {
-                "s3": {
-                    "bucket": {"name": "bucket"},
-                    "object": {"key": f"{pdf_scan_prefix}doc1/page_001.pdf"},
-                }
-            }
-        ]
-    }
+    event = _s3_event(f"{pdf_text_page_prefix}doc1/page_001.pdf")
     module.lambda_handler(event, {})
 
     md = s3_stub.objects[("bucket", f"{text_page_prefix}doc1/page_001.md")].decode()
-    assert called["engine"] == "trocr"
     schema = {"documentId": "doc1", "pageNumber": 1, "content": md}
     validate_schema(schema)
 
 
-def test_pdf_ocr_extractor_ocrmypdf(monkeypatch, s3_stub, validate_schema, config):
-    prefix = "/parameters/aio/ameritasAI/dev"
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    config[f"{prefix}/BUCKET_NAME"] = "bucket"
+@pytest.mark.parametrize(
+    "engine,extra_cfg",
+    [
+        (None, {}),
+        ("trocr", {"TROCR_ENDPOINT": "http://example"}),
+        ("docling", {"DOCLING_ENDPOINT": "http://example"}),
+        ("ocrmypdf", {"HOCR_PREFIX": "hocr/"}),
+    ],
+    ids=["default", "trocr", "docling", "ocrmypdf"],
+)
+def test_pdf_ocr_extractor(monkeypatch, s3_stub, validate_schema, idp_config, engine, extra_cfg):
     pdf_scan_prefix = "scan-pages/"
     text_page_prefix = "text-pages/"
-    hocr_prefix = "hocr/"
-    config[f"{prefix}/PDF_SCAN_PAGE_PREFIX"] = pdf_scan_prefix
-    config[f"{prefix}/TEXT_PAGE_PREFIX"] = text_page_prefix
-    config[f"{prefix}/HOCR_PREFIX"] = hocr_prefix
-    config[f"{prefix}/OCR_ENGINE"] = "ocrmypdf"
-    module = load_lambda("ocr_ocrmypdf", "services/idp/src/pdf_ocr_extractor_lambda.py")
-
-    s3_stub.objects[("bucket", f"{pdf_scan_prefix}doc1/page_001.pdf")] = b"data"
-
-    monkeypatch.setattr(module, "_ocrmypdf_hocr", lambda b: ("ocr", 0.9, b"<hocr></hocr>"))
-
-    event = {
-        "Records": [
-            {
-                "s3": {
-                    "bucket": {"name": "bucket"},
-                    "object": {"key": f"{pdf_scan_prefix}doc1/page_001.pdf"},
-                }
-            }
-        ]
-    }
-    module.lambda_handler(event, {})
-
-    md = s3_stub.objects[("bucket", f"{text_page_prefix}doc1/page_001.md")].decode()
-    hocr_json = json.loads(
-        s3_stub.objects[("bucket", f"{hocr_prefix}doc1/page_001.json")].decode()
+    if engine:
+        extra_cfg = dict(extra_cfg, OCR_ENGINE=engine)
+    idp_config(
+        PDF_SCAN_PAGE_PREFIX=pdf_scan_prefix,
+        TEXT_PAGE_PREFIX=text_page_prefix,
+        **extra_cfg,
     )
-    schema = {"documentId": "doc1", "pageNumber": 1, "content": md}
-    validate_schema(schema)
-    assert isinstance(hocr_json.get("words"), list)
-
-
-def test_pdf_ocr_extractor_docling(monkeypatch, s3_stub, validate_schema, config):
-    prefix = "/parameters/aio/ameritasAI/dev"
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    config[f"{prefix}/BUCKET_NAME"] = "bucket"
-    pdf_scan_prefix = "scan-pages/"
-    text_page_prefix = "text-pages/"
-    config[f"{prefix}/PDF_SCAN_PAGE_PREFIX"] = pdf_scan_prefix
-    config[f"{prefix}/TEXT_PAGE_PREFIX"] = text_page_prefix
-    config[f"{prefix}/OCR_ENGINE"] = "docling"
-    config[f"{prefix}/DOCLING_ENDPOINT"] = "http://example"
-    module = load_lambda("ocr_docling", "services/idp/src/pdf_ocr_extractor_lambda.py")
+    module = load_lambda("ocr", "services/idp/src/pdf_ocr_extractor_lambda.py")
 
     s3_stub.objects[("bucket", f"{pdf_scan_prefix}doc1/page_001.pdf")] = b"data"
 
-    monkeypatch.setattr(module, "_rasterize_page", lambda b, dpi: object())
     called = {}
+    if engine is None:
+        _install_ocr_stubs(
+            monkeypatch, module, extract=lambda img, e, t, d: "## Page 1\n\nocr\n"
+        )
+    elif engine == "ocrmypdf":
+        monkeypatch.setattr(module, "_ocrmypdf_hocr", lambda b: ("ocr", 0.9, b"<hocr></hocr>"))
+    else:
+        def fake(reader, engine, img):
+            called["engine"] = engine
+            return "ocr", 0.9
 
-    def fake(reader, engine, img):
-        called["engine"] = engine
-        return "ocr", 0.9
-
-    monkeypatch.setattr(module, "_perform_ocr", fake)
+        _install_ocr_stubs(monkeypatch, module, perform_ocr=fake)
 
-    event = {
-        "Records": [
-            {
-                "s3": {
-                    "bucket": {"name": "bucket"},
-                    "object": {"key": f"{pdf_scan_prefix}doc1/page_001.pdf"},
-                }
-            }
-        ]
-    }
+    event = _s3_event(f"{pdf_scan_prefix}doc1/page_001.pdf")
     module.lambda_handler(event, {})
 
     md = s3_stub.objects[("bucket", f"{text_page_prefix}doc1/page_001.md")].decode()
-    assert called["engine"] == "docling"
+    if engine in ("trocr", "docling"):
+        assert called["engine"] == engine
     schema = {"documentId": "doc1", "pageNumber": 1, "content": md}
     validate_schema(schema)
+    if engine == "ocrmypdf":
+        hocr_json = json.loads(
+            s3_stub.objects[("bucket", f"{extra_cfg['HOCR_PREFIX']}doc1/page_001.json")]
+        )
+        assert isinstance(hocr_json.get("words"), list)
 
 
-def test_combine(monkeypatch, s3_stub, validate_schema, config):
-    prefix = "/parameters/aio/ameritasAI/dev"
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    config[f"{prefix}/BUCKET_NAME"] = "bucket"
+def test_combine(monkeypatch, s3_stub, validate_schema, idp_config):
     pdf_page_prefix = "pdf-pages/"
     text_page_prefix = "text-pages/"
     text_doc_prefix = "text-docs/"
     hocr_prefix = "hocr/"
-    config[f"{prefix}/PDF_PAGE_PREFIX"] = pdf_page_prefix
-    config[f"{prefix}/TEXT_PAGE_PREFIX"] = text_page_prefix
-    config[f"{prefix}/TEXT_DOC_PREFIX"] = text_doc_prefix
-    config[f"{prefix}/HOCR_PREFIX"] = hocr_prefix
-    config[f"{prefix}/OCR_ENGINE"] = "ocrmypdf"
+    idp_config(
+        PDF_PAGE_PREFIX=pdf_page_prefix,
+        TEXT_PAGE_PREFIX=text_page_prefix,
+        TEXT_DOC_PREFIX=text_doc_prefix,
+        HOCR_PREFIX=hocr_prefix,
+        OCR_ENGINE="ocrmypdf",
+    )
     module = load_lambda("combine", "services/idp/src/combine_lambda.py")
 
-    s3_stub.objects[("bucket", f"{pdf_page_prefix}doc1/manifest.json")] = json.dumps(
-        {"documentId": "doc1", "pages": 2}
-    ).encode()
-    s3_stub.objects[("bucket", f"{text_page_prefix}doc1/page_001.md")] = b"## Page 1\n\none\n"
-    s3_stub.objects[("bucket", f"{text_page_prefix}doc1/page_002.md")] = b"## Page 2\n\ntwo\n"
-    s3_stub.objects[("bucket", f"{hocr_prefix}doc1/page_001.json")] = json.dumps({"words": []}).encode()
-    s3_stub.objects[("bucket", f"{hocr_prefix}doc1/page_002.json")] = json.dumps({"words": []}).encode()
-
-    event = {
-        "Records": [
-            {
-                "s3": {
-                    "bucket": {"name": "bucket"},
-                    "object": {"key": f"{text_page_prefix}doc1/page_001.md"},
-                }
-            }
-        ]
-    }
+    _seed_pages(s3_stub.objects, "doc1", 2, pdf_page_prefix, text_page_prefix)
+    s3_stub.objects.update(
+        {
+            ("bucket", f"{hocr_prefix}doc1/page_001.json"): _EMPTY_HOCR,
+            ("bucket", f"{hocr_prefix}doc1/page_002.json"): _EMPTY_HOCR,
+        }
+    )
+
+    event = _s3_event(f"{text_page_prefix}doc1/page_001.md")
     module.lambda_handler(event, {})
 
-    output = json.loads(s3_stub.objects[("bucket", f"{text_doc_prefix}doc1.json")].decode())
+    output = json.loads(s3_stub.objects[("bucket", f"{text_doc_prefix}doc1.json")])
     assert output["documentId"] == "doc1"
     assert output["pageCount"] == 2
     for i, page in enumerate(output["pages"], start=1):
         validate_schema(
             {"documentId": output["documentId"], "pageNumber": i, "content": page}
         )
-    combined_hocr = json.loads(
-        s3_stub.objects[("bucket", f"{hocr_prefix}doc1.json")].decode()
-    )
+    combined_hocr = json.loads(s3_stub.objects[("bucket", f"{hocr_prefix}doc1.json")])
     assert combined_hocr["documentId"] == "doc1"
     assert len(combined_hocr["pages"]) == 2
 
 
-def test_output(monkeypatch, s3_stub, validate_schema, config):
-    prefix = "/parameters/aio/ameritasAI/dev"
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    config[f"{prefix}/BUCKET_NAME"] = "bucket"
+@pytest.mark.parametrize("pages", [2, 20, 50])
+def test_combine_scales_with_page_count(s3_stub, idp_config, pages):
+    idp_config(
+        PDF_PAGE_PREFIX="pdf-pages/",
+        TEXT_PAGE_PREFIX="text-pages/",
+        TEXT_DOC_PREFIX="text-docs/",
+    )
+    module = load_lambda("combine", "services/idp/src/combine_lambda.py")
+    _seed_pages(s3_stub.objects, "doc1", pages)
+
+    module.lambda_handler(_s3_event("text-pages/doc1/page_001.md"), {})
+
+    output = json.loads(s3_stub.objects[("bucket", "text-docs/doc1.json")])
+    assert output["pageCount"] == pages
+    assert output["pages"][-1] == (_PAGE_MD % pages).decode()
+
+
+def test_output(monkeypatch, s3_stub, validate_schema, idp_config):
     text_doc_prefix = "text-docs/"
-    config[f"{prefix}/TEXT_DOC_PREFIX"] = text_doc_prefix
-    config[f"{prefix}/EDI_SEARCH_API_URL"] = "http://example"
-    config[f"{prefix}/EDI_SEARCH_API_KEY"] = "key"
+    idp_config(
+        TEXT_DOC_PREFIX=text_doc_prefix,
+        EDI_SEARCH_API_URL="http://example",
+        EDI_SEARCH_API_KEY="key",
+    )
     module = load_lambda("output", "services/idp/src/output_lambda.py")
 
-    payload = {
-        "documentId": "doc1",
-        "type": "pdf",
-        "pageCount": 1,
-        "pages": ["## Page 1\n\nhi\n"],
-    }
-    s3_stub.objects[("bucket", f"{text_doc_prefix}doc1.json")] = json.dumps(payload).encode()
+    s3_stub.objects[("bucket", f"{text_doc_prefix}doc1.json")] = _OUTPUT_DOC1
 
     sent = {}
     monkeypatch.setattr(
@@ -333,16 +264,7 @@ def test_output(monkeypatch, s3_stub, validate_schema, config):
         lambda data, url, key: sent.setdefault("payload", data) or True,
     )
 
-    event = {
-        "Records": [
-            {
-                "s3": {
-                    "bucket": {"name": "bucket"},
-                    "object": {"key": f"{text_doc_prefix}doc1.json"},
-                }
-            }
-        ]
-    }
+    event = _s3_event(f"{text_doc_prefix}doc1.json")
     module.lambda_handler(event, {})
 
     posted = sent["payload"]
@@ -353,84 +275,45 @@ def test_output(monkeypatch, s3_stub, validate_schema, config):
         )
 
 
-def test_ocr_image_engines(monkeypatch, config):
-    prefix = "/parameters/aio/ameritasAI/dev"
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    config[f"{prefix}/BUCKET_NAME"] = "bucket"
-    config[f"{prefix}/OCR_ENGINE"] = "easyocr"
-    module = load_lambda("ocr_easy", "services/idp/src/pdf_ocr_extractor_lambda.py")
-    module.easyocr = __import__("easyocr")
-    called = {}
-
-    def fake(r, e, b):
-        called["engine"] = e
-        called["cls"] = r.__class__.__name__
-        return "t", 0
-
-    monkeypatch.setattr(module, "_perform_ocr", fake)
-    module._ocr_image(object(), "easyocr", None, None)
-    assert called["engine"] == "easyocr"
-    assert called["cls"] == "DummyReader"
-
-    import types, sys
+@pytest.mark.parametrize(
+    "engine,extra_cfg,ocr_args,field,expected",
+    [
+        ("easyocr", {}, (None, None), "cls", "DummyReader"),
+        ("paddleocr", {}, (None, None), "cls", "DummyPaddle"),
+        ("trocr", {"TROCR_ENDPOINT": "http://example"}, ("http://example", None), "ctx", "http://example"),
+        ("docling", {"DOCLING_ENDPOINT": "http://example"}, (None, "http://example"), "ctx", "http://example"),
+    ],
+    ids=["easyocr", "paddleocr", "trocr", "docling"],
+)
+def test_ocr_image_engines(monkeypatch, idp_config, engine, extra_cfg, ocr_args, field, expected):
 
     class DummyPaddle:
         def __init__(self, *a, **k):
             pass
 
-    sys.modules["paddleocr"] = types.ModuleType("paddleocr")
-    sys.modules["paddleocr"].PaddleOCR = DummyPaddle
+    paddle = types.ModuleType("paddleocr")
+    paddle.PaddleOCR = DummyPaddle
+    monkeypatch.setitem(sys.modules, "paddleocr", paddle)
 
-    config[f"{prefix}/OCR_ENGINE"] = "paddleocr"
-    module = load_lambda("ocr_paddle", "services/idp/src/pdf_ocr_extractor_lambda.py")
-    module.easyocr = __import__("easyocr")
+    idp_config(OCR_ENGINE=engine, **extra_cfg)
+    module = load_lambda("ocr_engine", "services/idp/src/pdf_ocr_extractor_lambda.py")
+    if field == "cls":
+        monkeypatch.setattr(module, "easyocr", __import__("easyocr"))
     called = {}
 
-    def fake2(r, e, b):
+    def fake(r, e, b):
         called["engine"] = e
         called["cls"] = r.__class__.__name__
-        return "t", 0
-
-    monkeypatch.setattr(module, "_perform_ocr", fake2)
-    module._ocr_image(object(), "paddleocr", None, None)
-    assert called["engine"] == "paddleocr"
-    assert called["cls"] == "DummyPaddle"
-
-    config[f"{prefix}/OCR_ENGINE"] = "trocr"
-    config[f"{prefix}/TROCR_ENDPOINT"] = "http://example"
-    module = load_lambda("ocr_trocr_engine", "services/idp/src/pdf_ocr_extractor_lambda.py")
-    called = {}
-
-    def fake3(r, e, b):
-        called["engine"] = e
-        called["ctx"] = r
-        return "t", 0
-
-    monkeypatch.setattr(module, "_perform_ocr", fake3)
-    module._ocr_image(object(), "trocr", "http://example", None)
-    assert called["engine"] == "trocr"
-    assert called["ctx"] == "http://example"
-
-    config[f"{prefix}/OCR_ENGINE"] = "docling"
-    config[f"{prefix}/DOCLING_ENDPOINT"] = "http://example"
-    module = load_lambda(
-        "ocr_docling_engine", "services/idp/src/pdf_ocr_extractor_lambda.py"
-    )
-    called = {}
-
-    def fake4(r, e, b):
-        called["engine"] = e
         called["ctx"] = r
         return "t", 0
 
-    monkeypatch.setattr(module, "_perform_ocr", fake4)
-    module._ocr_image(object(), "docling", None, "http://example")
-    assert called["engine"] == "docling"
-    assert called["ctx"] == "http://example"
+    monkeypatch.setattr(module, "_perform_ocr", fake)
+    module._ocr_image(object(), engine, *ocr_args)
+    assert called["engine"] == engine
+    assert called[field] == expected
 
 
 def test_perform_ocr(monkeypatch):
-    import types, sys, importlib.util
 
     class DummyPaddle:
         def __init__(self, *a, **k):
@@ -439,8 +322,9 @@ def test_perform_ocr(monkeypatch):
         def ocr(self, img):
             return [([[0, 0], [1, 0], [1, 1], [0, 1]], ("pd", 0.8))]
 
-    sys.modules["paddleocr"] = types.ModuleType("paddleocr")
-    sys.modules["paddleocr"].PaddleOCR = DummyPaddle
+    paddle = types.ModuleType("paddleocr")
+    paddle.PaddleOCR = DummyPaddle
+    monkeypatch.setitem(sys.modules, "paddleocr", paddle)
 
     mod = load_lambda("ocr_real", "common/layers/ocr_layer/python/ocr_module.py")
     monkeypatch.setattr(mod, "preprocess_image_cv2", lambda b: "img")
@@ -478,41 +362,30 @@ def test_perform_ocr(monkeypatch):
         mod._perform_ocr(reader, "other", b"1")
 
 
-def test_embed_model_map_event(monkeypatch, config):
-    monkeypatch.setenv("EMBED_MODEL", "sbert")
-    monkeypatch.setenv("EMBED_MODEL_MAP", '{"pdf": "openai"}')
+@pytest.mark.parametrize(
+    "default,model_map,event,backend,expected_meta",
+    [
+        ("sbert", '{"pdf": "openai"}', {"chunks": ["t"], "docType": "pdf"}, "openai", None),
+        (
+            "sbert",
+            '{"pptx": "cohere"}',
+            {"chunks": [{"text": "hi", "metadata": {"docType": "pptx"}}]},
+            "cohere",
+            {"docType": "pptx"},
+        ),
+        ("cohere", '{"pdf": "openai"}', {"chunks": ["x"], "docType": "txt"}, "cohere", None),
+    ],
+    ids=["map_event", "map_chunk", "default"],
+)
+def test_embed_model(monkeypatch, config, default, model_map, event, backend, expected_meta):
+    monkeypatch.setenv("EMBED_MODEL", default)
+    monkeypatch.setenv("EMBED_MODEL_MAP", model_map)
     config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    module = load_lambda("embed_event", "services/rag-stack/src/embed_lambda.py")
-    monkeypatch.setattr(module, "_openai_embed", lambda t: [42])
-    module._MODEL_MAP["openai"] = module._openai_embed
-    out = module.lambda_handler({"chunks": ["t"], "docType": "pdf"}, {})
+    module = load_lambda("embed_model", "services/rag-stack/src/embed_lambda.py")
+    monkeypatch.setitem(module._BATCH_MODEL_MAP, backend, lambda ts: [[42] for _ in ts])
+    out = module.lambda_handler(event, {})
     assert out["embeddings"] == [[42]]
-    assert out["metadatas"] == [None]
-
-
-def test_embed_model_map_chunk(monkeypatch, config):
-    monkeypatch.setenv("EMBED_MODEL", "sbert")
-    monkeypatch.setenv("EMBED_MODEL_MAP", '{"pptx": "cohere"}')
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    module = load_lambda("embed_chunk", "services/rag-stack/src/embed_lambda.py")
-    monkeypatch.setattr(module, "_cohere_embed", lambda t: [24])
-    module._MODEL_MAP["cohere"] = module._cohere_embed
-    chunk = {"text": "hi", "metadata": {"docType": "pptx"}}
-    out = module.lambda_handler({"chunks": [chunk]}, {})
-    assert out["embeddings"] == [[24]]
-    assert out["metadatas"][0]["docType"] == "pptx"
-
-
-def test_embed_model_default(monkeypatch, config):
-    monkeypatch.setenv("EMBED_MODEL", "cohere")
-    monkeypatch.setenv("EMBED_MODEL_MAP", '{"pdf": "openai"}')
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    module = load_lambda("embed_default", "services/rag-stack/src/embed_lambda.py")
-    monkeypatch.setattr(module, "_cohere_embed", lambda t: [7])
-    module._MODEL_MAP["cohere"] = module._cohere_embed
-    out = module.lambda_handler({"chunks": ["x"], "docType": "txt"}, {})
-    assert out["embeddings"] == [[7]]
-    assert out["metadatas"] == [None]
+    assert out["metadatas"] == [expected_meta]
 
 
 def test_text_chunk_doc_type(monkeypatch, config):
@@ -524,51 +397,22 @@ def test_text_chunk_doc_type(monkeypatch, config):
     assert isinstance(result["chunks"][0], dict)
 
 
-def test_milvus_delete_lambda(monkeypatch):
-    import types, sys
-
-    dummy = types.ModuleType("pymilvus")
-    dummy.Collection = type(
-        "Coll",
-        (),
-        {
-            "__init__": lambda self, *a, **k: None,
-            "delete": lambda self, expr: types.SimpleNamespace(delete_count=2),
-        },
-    )
-    dummy.connections = types.SimpleNamespace(connect=lambda alias, host, port: None)
-    monkeypatch.setitem(sys.modules, "pymilvus", dummy)
-    import common_utils.milvus_client as mc
-
-    monkeypatch.setattr(mc, "Collection", dummy.Collection, raising=False)
-    monkeypatch.setattr(mc, "connections", dummy.connections, raising=False)
-
+def test_milvus_delete_lambda(monkeypatch, pymilvus_stub):
     module = import_vector_module("milvus_handler_lambda")
     proxy = import_vector_module("vector_db_proxy_lambda")
     called = {}
 
-    def fake_delete(self, ids):
+    def fake_delete(ids):
         called["ids"] = list(ids)
         return len(called["ids"])
 
-    monkeypatch.setattr(module, "client", type("C", (), {"delete": fake_delete})())
+    monkeypatch.setattr(module, "client", types.SimpleNamespace(delete=fake_delete))
     res = proxy.lambda_handler({"operation": "delete", "ids": [1, 2]}, {})
     assert called["ids"] == [1, 2]
     assert res["deleted"] == 2
 
 
-def test_milvus_update_lambda(monkeypatch):
-    import types, sys
-
-    dummy = types.ModuleType("pymilvus")
-    dummy.Collection = type("Coll", (), {"__init__": lambda self, *a, **k: None})
-    dummy.connections = types.SimpleNamespace(connect=lambda alias, host, port: None)
-    monkeypatch.setitem(sys.modules, "pymilvus", dummy)
-    import common_utils.milvus_client as mc
-
-    monkeypatch.setattr(mc, "Collection", dummy.Collection, raising=False)
-    monkeypatch.setattr(mc, "connections", dummy.connections, raising=False)
-
+def test_milvus_update_lambda(monkeypatch, pymilvus_stub):
     module = import_vector_module("milvus_handler_lambda")
     proxy = import_vector_module("vector_db_proxy_lambda")
     received = {}
@@ -580,7 +424,7 @@ def test_milvus_update_lambda(monkeypatch):
     monkeypatch.setattr(
         module,
         "client",
-        type("C", (), {"update": lambda self, items: fake_update(items)})(),
+        types.SimpleNamespace(update=fake_update),
     )
     event = {"embeddings": [[0.1, 0.2]], "metadatas": [{"a": 1}], "ids": [5]}
     res = proxy.lambda_handler(dict(event, operation="update"), {})
@@ -592,63 +436,25 @@ def test_milvus_update_lambda(monkeypatch):
     assert res["updated"] == 1
 
 
-def test_milvus_create_lambda(monkeypatch):
-    import types, sys
-
-    dummy = types.ModuleType("pymilvus")
-    dummy.FieldSchema = lambda *a, **k: None
-    dummy.CollectionSchema = lambda *a, **k: None
-    dummy.DataType = types.SimpleNamespace(INT64=0, FLOAT_VECTOR=1, JSON=2)
-    dummy.Collection = type(
-        "Coll",
-        (),
-        {"__init__": lambda self, *a, **k: None, "create_index": lambda *a, **k: None},
-    )
-    dummy.connections = types.SimpleNamespace(connect=lambda alias, host, port: None)
-    monkeypatch.setitem(sys.modules, "pymilvus", dummy)
-    import common_utils.milvus_client as mc
-
-    monkeypatch.setattr(mc, "Collection", dummy.Collection, raising=False)
-    monkeypatch.setattr(mc, "connections", dummy.connections, raising=False)
-    monkeypatch.setattr(mc, "FieldSchema", dummy.FieldSchema, raising=False)
-    monkeypatch.setattr(mc, "CollectionSchema", dummy.CollectionSchema, raising=False)
-    monkeypatch.setattr(mc, "DataType", dummy.DataType, raising=False)
-
+def test_milvus_create_lambda(monkeypatch, pymilvus_stub):
     module = import_vector_module("milvus_handler_lambda")
     proxy = import_vector_module("vector_db_proxy_lambda")
     called = {}
     monkeypatch.setattr(
         module,
         "client",
-        type(
-            "C",
-            (),
-            {
-                "create_collection": lambda self, dimension=768: called.setdefault(
-                    "dimension", dimension
-                )
-            },
-        )(),
+        types.SimpleNamespace(
+            create_collection=lambda dimension=768: called.setdefault(
+                "dimension", dimension
+            )
+        ),
     )
     res = proxy.lambda_handler({"operation": "create", "dimension": 42}, {})
     assert called["dimension"] == 42
     assert res["created"] is True
 
 
-def test_milvus_drop_lambda(monkeypatch):
-    import types, sys
-
-    dummy = types.ModuleType("pymilvus")
-    dummy.Collection = type(
-        "Coll", (), {"__init__": lambda self, *a, **k: None, "drop": lambda self: None}
-    )
-    dummy.connections = types.SimpleNamespace(connect=lambda alias, host, port: None)
-    monkeypatch.setitem(sys.modules, "pymilvus", dummy)
-    import common_utils.milvus_client as mc
-
-    monkeypatch.setattr(mc, "Collection", dummy.Collection, raising=False)
-    monkeypatch.setattr(mc, "connections", dummy.connections, raising=False)
-
+def test_milvus_drop_lambda(monkeypatch, pymilvus_stub):
     module = import_vector_module("milvus_handler_lambda")
     proxy = import_vector_module("vector_db_proxy_lambda")
     called = {"dropped": False}
@@ -657,116 +463,116 @@ def test_milvus_drop_lambda(monkeypatch):
         called["dropped"] = True
 
     monkeypatch.setattr(
-        module, "client", type("C", (), {"drop_collection": lambda self: fake_drop()})()
+        module, "client", types.SimpleNamespace(drop_collection=fake_drop)
     )
     res = proxy.lambda_handler({"operation": "drop"}, {})
     assert called["dropped"] is True
     assert res["dropped"] is True
 
 
-def test_es_insert_lambda(monkeypatch):
+def test_es_insert_lambda(monkeypatch, pymilvus_stub):
     module = import_vector_module("elastic_search_handler_lambda")
     proxy = import_vector_module("vector_db_proxy_lambda")
     captured = {}
 
-    def fake_insert(self, docs):
+    def fake_insert(docs):
         captured["docs"] = list(docs)
         return len(captured["docs"])
 
-    monkeypatch.setattr(module, "client", type("C", (), {"insert": fake_insert})())
+    monkeypatch.setattr(module, "client", types.SimpleNamespace(insert=fake_insert))
     res = proxy.lambda_handler({"operation": "insert", "documents": [{"id": "1", "text": "a"}], "storage_mode": "es"}, {})
     assert captured["docs"][0]["id"] == "1"
     assert res["inserted"] == 1
 
 
-def test_es_delete_lambda(monkeypatch):
+def test_es_delete_lambda(monkeypatch, pymilvus_stub):
     module = import_vector_module("elastic_search_handler_lambda")
     proxy = import_vector_module("vector_db_proxy_lambda")
     called = {}
 
-    def fake_delete(self, ids):
+    def fake_delete(ids):
         called["ids"] = list(ids)
         return len(called["ids"])
 
-    monkeypatch.setattr(module, "client", type("C", (), {"delete": fake_delete})())
+    monkeypatch.setattr(module, "client", types.SimpleNamespace(delete=fake_delete))
     res = proxy.lambda_handler({"operation": "delete", "ids": ["1", "2"], "storage_mode": "es"}, {})
     assert called["ids"] == ["1", "2"]
     assert res["deleted"] == 2
 
 
-def test_es_update_lambda(monkeypatch):
+def test_es_update_lambda(monkeypatch, pymilvus_stub):
     module = import_vector_module("elastic_search_handler_lambda")
     proxy = import_vector_module("vector_db_proxy_lambda")
     captured = {}
 
-    def fake_update(self, docs):
+    def fake_update(docs):
         captured["docs"] = list(docs)
         return len(captured["docs"])
 
-    monkeypatch.setattr(module, "client", type("C", (), {"update": fake_update})())
+    monkeypatch.setattr(module, "client", types.SimpleNamespace(update=fake_update))
     res = proxy.lambda_handler({"operation": "update", "documents": [{"id": "1", "text": "x"}], "storage_mode": "es"}, {})
     assert captured["docs"][0]["text"] == "x"
     assert res["updated"] == 1
 
 
-def test_es_create_lambda(monkeypatch):
+def test_es_create_lambda(monkeypatch, pymilvus_stub):
     module = import_vector_module("elastic_search_handler_lambda")
     proxy = import_vector_module("vector_db_proxy_lambda")
     called = {"created": False}
     monkeypatch.setattr(
         module,
         "client",
-        type(
-            "C", (), {"create_index": lambda self: called.__setitem__("created", True)}
-        )(),
+        types.SimpleNamespace(
+            create_index=lambda: called.__setitem__("created", True)
+        ),
     )
     res = proxy.lambda_handler({"operation": "create-index", "storage_mode": "es"}, {})
     assert called["created"] is True
     assert res["created"] is True
 
 
-def test_es_drop_lambda(monkeypatch):
+def test_es_drop_lambda(monkeypatch, pymilvus_stub):
     module = import_vector_module("elastic_search_handler_lambda")
     proxy = import_vector_module("vector_db_proxy_lambda")
     called = {"dropped": False}
     monkeypatch.setattr(
         module,
         "client",
-        type(
-            "C", (), {"drop_index": lambda self: called.__setitem__("dropped", True)}
-        )(),
+        types.SimpleNamespace(
+            drop_index=lambda: called.__setitem__("dropped", True)
+        ),
     )
     res = proxy.lambda_handler({"operation": "drop-index", "storage_mode": "es"}, {})
     assert called["dropped"] is True
     assert res["dropped"] is True
 
 
-def test_es_search_lambda(monkeypatch):
+def test_es_search_lambda(monkeypatch, pymilvus_stub):
     module = import_vector_module("elastic_search_handler_lambda")
     proxy = import_vector_module("vector_db_proxy_lambda")
     captured = {}
 
-    def fake_search(self, embedding, top_k=5):
+    def fake_search(embedding, top_k=5):
         captured["top_k"] = top_k
         return [{"id": "1"}]
 
-    monkeypatch.setattr(module, "client", type("C", (), {"search": fake_search})())
+    monkeypatch.setattr(module, "client", types.SimpleNamespace(search=fake_search))
     out = proxy.lambda_handler({"operation": "search", "embedding": [0.1], "top_k": 3, "storage_mode": "es"}, {})
     assert captured["top_k"] == 3
     assert out["matches"][0]["id"] == "1"
 
 
-def test_es_hybrid_search_lambda(monkeypatch):
+def test_es_hybrid_search_lambda(monkeypatch, pymilvus_stub):
     module = import_vector_module("elastic_search_handler_lambda")
     proxy = import_vector_module("vector_db_proxy_lambda")
     captured = {}
 
-    def fake_search(self, embedding, keywords=None, top_k=5):
+    def fake_search(embedding, keywords=None, top_k=5):
         captured["kw"] = list(keywords)
         return [{"id": "1"}]
 
     monkeypatch.setattr(
-        module, "client", type("C", (), {"hybrid_search": fake_search})()
+        module, "client", types.SimpleNamespace(hybrid_search=fake_search)
     )
     out = proxy.lambda_handler({"operation": "hybrid-search", "embedding": [0.1], "keywords": ["x"], "storage_mode": "es"}, {})
     assert captured["kw"] == ["x"]
@@ -777,89 +583,53 @@ import sys
 
 
 
-def test_llm_router_lambda_handler(monkeypatch):
+@pytest.mark.parametrize(
+    "prompt,backend,expected",
+    [
+        ("short text", None, "ollama"),
+        ("one two three four", None, "bedrock"),
+        ("short text", "bedrock", "bedrock"),
+        ("one two three four", "ollama", "ollama"),
+    ],
+    ids=["short", "long", "override_bedrock", "override_ollama"],
+)
+def test_llm_router_lambda_handler(monkeypatch, sqs_calls, prompt, backend, expected):
     monkeypatch.setenv("INVOCATION_QUEUE_URL", "url")
     monkeypatch.setenv("PROMPT_COMPLEXITY_THRESHOLD", "3")
-    calls = []
-    monkeypatch.setattr(
-        sys.modules["boto3"], "client", lambda name: _make_fake_send(calls)
-    )
     module = load_lambda(
         "llm_router_lambda", "services/llm-gateway/src/llm_router_lambda.py"
     )
-    module.sqs_client = sys.modules["boto3"].client("sqs")
-
-    event1 = {"body": json.dumps({"prompt": "short text"})}
-    out1 = module.lambda_handler(event1, {})
-    body1 = json.loads(out1["body"])
-    assert body1["backend"] == "ollama"
-    assert body1["queued"] is True
-    assert calls[0]["backend"] == "ollama"
-
-    event2 = {"body": json.dumps({"prompt": "one two three four"})}
-    out2 = module.lambda_handler(event2, {})
-    body2 = json.loads(out2["body"])
-    assert body2["backend"] == "bedrock"
-    assert body2["queued"] is True
-    assert calls[1]["backend"] == "bedrock"
-
-
-def test_llm_router_lambda_handler_backend_override(monkeypatch):
-    monkeypatch.setenv("INVOCATION_QUEUE_URL", "url")
-    monkeypatch.setenv("PROMPT_COMPLEXITY_THRESHOLD", "3")
-    calls = []
-    monkeypatch.setattr(
-        sys.modules["boto3"], "client", lambda name: _make_fake_send(calls)
-    )
-    module = load_lambda(
-        "llm_router_lambda_override", "services/llm-gateway/src/llm_router_lambda.py"
-    )
-    module.sqs_client = sys.modules["boto3"].client("sqs")
-
-    event = {"body": json.dumps({"prompt": "short text", "backend": "bedrock"})}
-    out = module.lambda_handler(event, {})
-    body = json.loads(out["body"])
-    assert body["backend"] == "bedrock"
-    assert body["queued"] is True
-    assert calls[0]["backend"] == "bedrock"
-
-    event2 = {"body": json.dumps({"prompt": "one two three four", "backend": "ollama"})}
-    out2 = module.lambda_handler(event2, {})
-    body2 = json.loads(out2["body"])
-    assert body2["backend"] == "ollama"
-    assert body2["queued"] is True
-    assert calls[1]["backend"] == "ollama"
 
+    body = {"prompt": prompt}
+    if backend:
+        body["backend"] = backend
+    out = module.lambda_handler({"body": json.dumps(body)}, {})
+    result = json.loads(out["body"])
+    assert result["backend"] == expected
+    assert result["queued"] is True
+    assert sqs_calls[0]["backend"] == expected
 
 
 def test_summarize_with_context_router(monkeypatch, config):
-    prefix = "/parameters/aio/ameritasAI/dev"
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    config[f"{prefix}/VECTOR_SEARCH_FUNCTION"] = "vector-search"
+    config.update(_cfg(VECTOR_SEARCH_FUNCTION="vector-search"))
 
     # stub lambda invoke to return a single match with context text
-    class FakePayload:
-        def __init__(self, data):
-            self._data = data
-
-        def read(self):
-            return json.dumps(self._data).encode("utf-8")
+    search_resp = {"Payload": FakePayload({"matches": [{"metadata": {"text": "ctx"}}]})}
+    calls = []
 
     def fake_invoke(FunctionName=None, Payload=None):
         # capture payload sent to vector search
-        fake_invoke.calls.append(json.loads(Payload))
-        return {"Payload": FakePayload({"matches": [{"metadata": {"text": "ctx"}}]})}
-
-    fake_invoke.calls = []
+        calls.append(json.loads(Payload))
+        return search_resp
 
     module = load_lambda(
         "summ_ctx", "services/rag-stack/src/retrieval_lambda.py"
     )
     monkeypatch.setattr(
-        module, "lambda_client", type("C", (), {"invoke": staticmethod(fake_invoke)})()
+        module, "lambda_client", types.SimpleNamespace(invoke=fake_invoke)
     )
     monkeypatch.setattr(module, "_sbert_embed", lambda t: [0.1])
-    module._MODEL_MAP["sbert"] = module._sbert_embed
+    monkeypatch.setitem(module._MODEL_MAP, "sbert", module._sbert_embed)
 
     sent = {}
 
@@ -873,7 +643,7 @@ def test_summarize_with_context_router(monkeypatch, config):
         {"query": "hi", "model": "phi", "temperature": 0.2, "collection_name": "c"},
         {}
     )
-    sent_payload = fake_invoke.calls[0]
+    sent_payload = calls[0]
     assert "embedding" in sent_payload
     assert isinstance(sent_payload["embedding"], list)
     assert sent_payload["operation"] == "search"
@@ -887,6 +657,70 @@ def test_summarize_with_context_router(monkeypatch, config):
     assert out["result"] == {"text": "ok"}
 
 
+def test_retrieval_records_run_concurrently(monkeypatch, config):
+    config.update(_cfg(VECTOR_SEARCH_FUNCTION="vector-search"))
+    module = load_lambda("retrieval_batch", "services/rag-stack/src/retrieval_lambda.py")
+    # every search blocks until all three records are in flight, so a
+    # sequential handler would time out and return empty results
+    barrier = threading.Barrier(3, timeout=5)
+
+    search_resp = {"Payload": FakePayload({"matches": [{"metadata": {"text": "ctx"}}]})}
+
+    def fake_invoke(FunctionName=None, Payload=None):
+        barrier.wait()
+        return search_resp
+
+    monkeypatch.setattr(
+        module, "lambda_client", types.SimpleNamespace(invoke=fake_invoke)
+    )
+    monkeypatch.setattr(module, "forward_to_routellm", lambda p: {"q": p["query"]})
+    records = [
+        {"body": json.dumps({"collection_name": "c", "query": q, "embedding": [0.1]})}
+        for q in ("a", "b", "c")
+    ]
+    out = module.lambda_handler({"Records": records}, {})
+    assert out == [{"result": {"q": "a"}}, {"result": {"q": "b"}}, {"result": {"q": "c"}}]
+
+
+def test_retrieval_concurrent_records_load_model_once(monkeypatch, config):
+    config.update(_cfg(VECTOR_SEARCH_FUNCTION="vector-search"))
+    module = load_lambda("retrieval_cold", "services/rag-stack/src/retrieval_lambda.py")
+    # the records carry no embedding, so every worker embeds its query and
+    # they all reach the cold model load together
+    barrier = threading.Barrier(3, timeout=5)
+    loads = []
+
+    class FakeModel:
+        def __init__(self, path):
+            loads.append(path)
+            time.sleep(0.05)
+
+        def encode(self, texts):
+            return [types.SimpleNamespace(tolist=lambda: [0.1])]
+
+    def fake_embed(text):
+        barrier.wait()
+        return module._sbert_embed(text)
+
+    monkeypatch.setitem(
+        sys.modules,
+        "sentence_transformers",
+        types.SimpleNamespace(SentenceTransformer=FakeModel),
+    )
+    monkeypatch.setitem(module._MODEL_MAP, "sbert", fake_embed)
+    search_resp = {"Payload": FakePayload({"matches": [{"metadata": {"text": "ctx"}}]})}
+    monkeypatch.setattr(
+        module, "lambda_client", types.SimpleNamespace(invoke=lambda **kw: search_resp)
+    )
+    monkeypatch.setattr(module, "forward_to_routellm", lambda p: {"q": p["query"]})
+    records = [
+        {"body": json.dumps({"collection_name": "c", "query": q})} for q in ("a", "b", "c")
+    ]
+    out = module.lambda_handler({"Records": records}, {})
+    assert out == [{"result": {"q": "a"}}, {"result": {"q": "b"}}, {"result": {"q": "c"}}]
+    assert len(loads) == 1
+
+
 def test_rerank_lambda(monkeypatch, config):
     config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
     module = load_lambda("rerank", "services/rag-stack/src/rerank_lambda.py")
@@ -900,12 +734,90 @@ def test_rerank_lambda(monkeypatch, config):
     assert "rerank_score" in out["matches"][0]
 
 
+def test_rerank_lambda_top_k_order(monkeypatch, config):
+    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
+    module = load_lambda("rerank_order", "services/rag-stack/src/rerank_lambda.py")
+    monkeypatch.setattr(module, "_score_pairs", lambda q, d: [0.2, 0.7, 0.2, 0.9])
+    matches = [{"id": i, "metadata": {"text": str(i)}} for i in range(5)]
+    out = module.lambda_handler({"query": "x", "matches": matches, "top_k": 4}, {})
+    assert [m["id"] for m in out["matches"]] == [3, 1, 0, 2]
+    assert [m["rerank_score"] for m in out["matches"]] == [0.9, 0.7, 0.2, 0.2]
+
+
+def test_rerank_cache_hit(monkeypatch, config):
+    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
+    module = load_lambda("rerank_cache", "services/rag-stack/src/rerank_lambda.py")
+    scorer = mock.Mock(return_value=[0.1, 0.9])
+    monkeypatch.setattr(module, "_score_pairs", scorer)
+    matches = [
+        {"id": 1, "metadata": {"text": "a"}},
+        {"id": 2, "metadata": {"text": "b"}},
+    ]
+    event = {"query": "x", "matches": matches, "top_k": 2}
+    first = module.lambda_handler(event, {})
+    second = module.lambda_handler(event, {})
+    assert scorer.call_count == 1
+    assert first == second
+    module.lambda_handler(dict(event, query="y"), {})
+    assert scorer.call_count == 2
+
+
+def test_rerank_failure_not_cached(monkeypatch, config):
+    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
+    module = load_lambda("rerank_retry", "services/rag-stack/src/rerank_lambda.py")
+    scorer = mock.Mock(side_effect=[RuntimeError("provider down"), [0.1, 0.9]])
+    monkeypatch.setattr(module, "_score_pairs", scorer)
+    matches = [
+        {"id": 1, "metadata": {"text": "a"}},
+        {"id": 2, "metadata": {"text": "b"}},
+    ]
+    event = {"query": "x", "matches": matches, "top_k": 2}
+    failed = module.lambda_handler(event, {})
+    assert [m["rerank_score"] for m in failed["matches"]] == [0.0, 0.0]
+    assert [m["id"] for m in failed["matches"]] == [1, 2]
+    retried = module.lambda_handler(event, {})
+    assert scorer.call_count == 2
+    assert [m["id"] for m in retried["matches"]] == [2, 1]
+
+
+@pytest.mark.parametrize(
+    "query",
+    ['"exact phrase"', "report_2024.pdf", "Claims.XLSX", "3f2504e0-4f89-11d3-9a0c-0305e82c3301"],
+    ids=["quoted", "filename", "filename_upper", "guid"],
+)
+def test_rerank_literal_query_skips_scorer(monkeypatch, config, query):
+    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
+    module = load_lambda("rerank_literal", "services/rag-stack/src/rerank_lambda.py")
+    monkeypatch.setattr(
+        module, "_score_pairs", mock.Mock(side_effect=AssertionError("should not run"))
+    )
+    matches = [
+        {"id": 1, "metadata": {"text": "a"}},
+        {"id": 2, "metadata": {"text": "b"}},
+    ]
+    out = module.lambda_handler({"query": query, "matches": matches, "top_k": 1}, {})
+    assert out["matches"] == [{**matches[0], "rerank_score": None}]
+
+
+@pytest.mark.parametrize("query", ["Node.js", "ASP.NET", "3.14"])
+def test_rerank_dotted_terms_are_scored(monkeypatch, config, query):
+    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
+    module = load_lambda("rerank_dotted", "services/rag-stack/src/rerank_lambda.py")
+    monkeypatch.setattr(module, "_score_pairs", lambda q, d: [0.1, 0.9])
+    matches = [
+        {"id": 1, "metadata": {"text": "a"}},
+        {"id": 2, "metadata": {"text": "b"}},
+    ]
+    out = module.lambda_handler({"query": query, "matches": matches, "top_k": 1}, {})
+    assert out["matches"] == [{**matches[1], "rerank_score": 0.9}]
+
+
 def test_rerank_lambda_cohere(monkeypatch, config):
     config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
     monkeypatch.setenv("RERANK_PROVIDER", "cohere")
     module = load_lambda("rerank_co", "services/rag-stack/src/rerank_lambda.py")
     monkeypatch.setattr(module, "_cohere_rerank", lambda q, d: [0.8, 0.1])
-    module._PROVIDER_MAP["cohere"] = module._cohere_rerank
+    monkeypatch.setitem(module._PROVIDER_MAP, "cohere", module._cohere_rerank)
     matches = [
         {"id": 1, "metadata": {"text": "a"}},
         {"id": 2, "metadata": {"text": "b"}},
@@ -922,40 +834,31 @@ def test_rerank_lambda_invalid(monkeypatch, config):
 
 
 def test_summarize_with_rerank(monkeypatch, config):
-    prefix = "/parameters/aio/ameritasAI/dev"
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    config[f"{prefix}/VECTOR_SEARCH_FUNCTION"] = "vector-search"
-    config[f"{prefix}/RERANK_FUNCTION"] = "rerank"
-    config[f"{prefix}/VECTOR_SEARCH_CANDIDATES"] = "2"
-
-    class FakePayload:
-        def __init__(self, data):
-            self._data = data
+    config.update(
+        _cfg(
+            VECTOR_SEARCH_FUNCTION="vector-search",
+            RERANK_FUNCTION="rerank",
+            VECTOR_SEARCH_CANDIDATES="2",
+        )
+    )
 
-        def read(self):
-            return json.dumps(self._data).encode("utf-8")
+    search_resp = {
+        "Payload": FakePayload(
+            {"matches": [{"metadata": {"text": "t1"}}, {"metadata": {"text": "t2"}}]}
+        )
+    }
+    rerank_resp = {
+        "Payload": FakePayload({"matches": [{"metadata": {"text": "t2"}, "rerank_score": 0.9}]})
+    }
 
     def fake_invoke(FunctionName=None, Payload=None):
         payload = json.loads(Payload)
         if FunctionName == "vector-search":
             fake_invoke.search = payload
-            return {
-                "Payload": FakePayload(
-                    {
-                        "matches": [
-                            {"metadata": {"text": "t1"}},
-                            {"metadata": {"text": "t2"}},
-                        ]
-                    }
-                )
-            }
+            return search_resp
         else:
             fake_invoke.rerank = payload
-            return {
-                "Payload": FakePayload(
-                    {"matches": [{"metadata": {"text": "t2"}, "rerank_score": 0.9}]}
-                )
-            }
+            return rerank_resp
 
     fake_invoke.rerank = None
     fake_invoke.search = None
@@ -964,10 +867,10 @@ def test_summarize_with_rerank(monkeypatch, config):
         "summ_ctx_rerank", "services/rag-stack/src/retrieval_lambda.py"
     )
     monkeypatch.setattr(
-        module, "lambda_client", type("C", (), {"invoke": staticmethod(fake_invoke)})()
+        module, "lambda_client", types.SimpleNamespace(invoke=fake_invoke)
     )
     monkeypatch.setattr(module, "_sbert_embed", lambda t: [0.1])
-    module._MODEL_MAP["sbert"] = module._sbert_embed
+    monkeypatch.setitem(module._MODEL_MAP, "sbert", module._sbert_embed)
     monkeypatch.setattr(module, "forward_to_routellm", lambda p: {"text": p["context"]})
 
     out = module.lambda_handler({"query": "hi", "collection_name": "c"}, {})
@@ -995,7 +898,7 @@ def test_text_chunk_strategy_override(monkeypatch, config):
             pass
 
         def chunk(self, text: str, file_name: str | None = None):
-            return [type("C", (), {"text": "univ"})]
+            return [types.SimpleNamespace(text="univ")]
 
     monkeypatch.setattr(module, "UniversalFileChunker", FakeChunker)
     out = module.lambda_handler({"text": "abc", "chunkStrategy": "universal"}, {})
@@ -1018,13 +921,63 @@ def test_text_chunk_strategy_default(monkeypatch, config):
 def test_embed_event_override(monkeypatch, config):
     config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
     module = load_lambda("embed_override", "services/rag-stack/src/embed_lambda.py")
-    monkeypatch.setattr(module, "_openai_embed", lambda t: [9])
-    module._MODEL_MAP["openai"] = module._openai_embed
+    monkeypatch.setitem(module._BATCH_MODEL_MAP, "openai", lambda ts: [[9] for _ in ts])
     out = module.lambda_handler({"chunks": ["x"], "embedModel": "openai"}, {})
     assert out["embeddings"] == [[9]]
     assert out["metadatas"] == [None]
 
 
+def test_embed_batches_chunks(monkeypatch, config):
+    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
+    monkeypatch.setenv("EMBED_MODEL_MAP", '{"pdf": "openai"}')
+    module = load_lambda("embed_batch", "services/rag-stack/src/embed_lambda.py")
+    batches = []
+
+    def fake_batch(texts):
+        batches.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    monkeypatch.setitem(module._BATCH_MODEL_MAP, "sbert", fake_batch)
+    monkeypatch.setitem(module._BATCH_MODEL_MAP, "openai", lambda ts: [[-1.0] for _ in ts])
+    chunks = [f"chunk {'x' * i}" for i in range(20)]
+    chunks.insert(5, {"text": "pdf", "metadata": {"docType": "pdf"}})
+    out = module.lambda_handler({"chunks": chunks, "embedModel": "sbert"}, {})
+    assert len(batches) == 1 and len(batches[0]) == 20
+    assert out["embeddings"][5] == [-1.0]
+    assert out["embeddings"][6] == [float(len(chunks[6]))]
+    assert len(out["embeddings"]) == len(out["metadatas"]) == 21
+
+
+@pytest.mark.parametrize(
+    "model, batch_size, expected",
+    [("sbert", "8", [8, 8, 4]), ("cohere", "500", [96, 96, 8])],
+    ids=["configured", "provider_limit"],
+)
+def test_embed_splits_large_batches(monkeypatch, config, model, batch_size, expected):
+    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
+    monkeypatch.setenv("EMBED_BATCH_SIZE", batch_size)
+    module = load_lambda("embed_split", "services/rag-stack/src/embed_lambda.py")
+    sizes = []
+
+    def fake_batch(texts):
+        sizes.append(len(texts))
+        return [[float(t)] for t in texts]
+
+    monkeypatch.setitem(module._BATCH_MODEL_MAP, model, fake_batch)
+    count = sum(expected)
+    out = module.lambda_handler({"chunks": [str(i) for i in range(count)], "embedModel": model}, {})
+    assert sizes == expected
+    assert out["embeddings"] == [[float(i)] for i in range(count)]
+
+
+def test_embed_per_chunk_model(monkeypatch, config):
+    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
+    module = load_lambda("embed_single", "services/rag-stack/src/embed_lambda.py")
+    monkeypatch.setitem(module._MODEL_MAP, "custom", lambda t: [len(t)])
+    out = module.lambda_handler({"chunks": ["a", "bbb"], "embedModel": "custom"}, {})
+    assert out["embeddings"] == [[1], [3]]
+
+
 def test_text_chunk_entities(monkeypatch, config):
     config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
     monkeypatch.setenv("EXTRACT_ENTITIES", "true")
@@ -1037,140 +990,68 @@ def test_text_chunk_entities(monkeypatch, config):
     assert md["entities"] == ["ORG:Acme"]
 
 
-def test_vector_search_top_k(monkeypatch, config):
+def test_vector_search_top_k(monkeypatch, config, pymilvus_stub):
     config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    import types, sys
-
-    dummy = types.ModuleType("pymilvus")
-    dummy.Collection = type("Coll", (), {"__init__": lambda self, *a, **k: None})
-    dummy.connections = types.SimpleNamespace(connect=lambda alias, host, port: None)
-    monkeypatch.setitem(sys.modules, "pymilvus", dummy)
-    import common_utils.milvus_client as mc
-
-    monkeypatch.setattr(mc, "Collection", dummy.Collection, raising=False)
-    monkeypatch.setattr(mc, "connections", dummy.connections, raising=False)
-
     module = import_vector_module("milvus_handler_lambda")
     proxy = import_vector_module("vector_db_proxy_lambda")
     called = {}
 
-    def fake_search(self, embedding, top_k=5):
+    def fake_search(embedding, top_k=5):
         called["top_k"] = top_k
-        return [type("R", (), {"id": 1, "score": 0.1, "metadata": {}})]
+        return [SearchResult(id=1, score=0.1, metadata={})]
 
-    monkeypatch.setattr(module, "client", type("C", (), {"search": fake_search})())
+    monkeypatch.setattr(module, "client", types.SimpleNamespace(search=fake_search))
     proxy.lambda_handler({"operation": "search", "embedding": [0.1], "top_k": 7}, {})
     assert called["top_k"] == 7
 
 
-def test_vector_search_invalid(monkeypatch, config):
+def test_vector_search_invalid(monkeypatch, config, pymilvus_stub):
     config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    import types, sys
-
-    dummy = types.ModuleType("pymilvus")
-    dummy.Collection = type("Coll", (), {"__init__": lambda self, *a, **k: None})
-    dummy.connections = types.SimpleNamespace(connect=lambda alias, host, port: None)
-    monkeypatch.setitem(sys.modules, "pymilvus", dummy)
-    import common_utils.milvus_client as mc
-
-    monkeypatch.setattr(mc, "Collection", dummy.Collection, raising=False)
-    monkeypatch.setattr(mc, "connections", dummy.connections, raising=False)
-
     module = import_vector_module("milvus_handler_lambda")
     proxy = import_vector_module("vector_db_proxy_lambda")
     out = proxy.lambda_handler({"operation": "search", "embedding": "bad"}, {})
     assert out["matches"] == []
 
 
-def test_vector_search_filters(monkeypatch, config):
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    import types, sys
-
-    dummy = types.ModuleType("pymilvus")
-    dummy.Collection = type("Coll", (), {"__init__": lambda self, *a, **k: None})
-    dummy.connections = types.SimpleNamespace(connect=lambda alias, host, port: None)
-    monkeypatch.setitem(sys.modules, "pymilvus", dummy)
-    import common_utils.milvus_client as mc
-
-    monkeypatch.setattr(mc, "Collection", dummy.Collection, raising=False)
-    monkeypatch.setattr(mc, "connections", dummy.connections, raising=False)
-
-    module = import_vector_module("milvus_handler_lambda")
-    proxy = import_vector_module("vector_db_proxy_lambda")
-
-    def fake_search(self, embedding, top_k=5):
-        meta1 = {"department": "HR", "team": "x", "user": "u1"}
-        meta2 = {"department": "IT", "team": "y", "user": "u2"}
-        return [
-            type("R", (), {"id": 1, "score": 0.1, "metadata": meta1}),
-            type("R", (), {"id": 2, "score": 0.2, "metadata": meta2}),
-        ]
-
-    monkeypatch.setattr(module, "client", type("C", (), {"search": fake_search})())
-    res = proxy.lambda_handler({"operation": "search", "embedding": [0.1], "department": "HR"}, {})
-    assert (
-        len(res["matches"]) == 1 and res["matches"][0]["metadata"]["department"] == "HR"
-    )
-
-
-def test_vector_search_entity_filter(monkeypatch, config):
+@pytest.mark.parametrize(
+    "metadatas, filters, expected_id",
+    [
+        (
+            [{"department": "HR", "team": "x", "user": "u1"}, {"department": "IT", "team": "y", "user": "u2"}],
+            {"department": "HR"},
+            1,
+        ),
+        (
+            [{"department": "HR", "team": "x", "user": "u1"}, {"department": "IT", "team": "y", "user": "u2"}],
+            {"team": "y", "user": "u2"},
+            2,
+        ),
+        ([{"entities": ["ORG:Acme"]}, {"entities": ["ORG:Other"]}], {"entities": ["ORG:Acme"]}, 1),
+        (
+            [{"entities": ["ORG:Acme"]}, {"entities": ["ORG:Other"]}],
+            {"entities": ["ORG:Zed", "ORG:Other"]},
+            2,
+        ),
+        ([{"file_guid": "g1", "file_name": "a"}, {"file_guid": "g2", "file_name": "b"}], {"file_guid": "g2"}, 2),
+    ],
+    ids=["department", "team_user", "entities", "entities_any", "file_guid"],
+)
+def test_vector_search_filter(monkeypatch, config, pymilvus_stub, metadatas, filters, expected_id):
     config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    import types, sys
-
-    dummy = types.ModuleType("pymilvus")
-    dummy.Collection = type("Coll", (), {"__init__": lambda self, *a, **k: None})
-    dummy.connections = types.SimpleNamespace(connect=lambda alias, host, port: None)
-    monkeypatch.setitem(sys.modules, "pymilvus", dummy)
-    import common_utils.milvus_client as mc
-
-    monkeypatch.setattr(mc, "Collection", dummy.Collection, raising=False)
-    monkeypatch.setattr(mc, "connections", dummy.connections, raising=False)
-
     module = import_vector_module("milvus_handler_lambda")
     proxy = import_vector_module("vector_db_proxy_lambda")
 
-    def fake_search(self, embedding, top_k=5):
-        meta1 = {"entities": ["ORG:Acme"]}
-        meta2 = {"entities": ["ORG:Other"]}
+    def fake_search(embedding, top_k=5):
         return [
-            type("R", (), {"id": 1, "score": 0.1, "metadata": meta1}),
-            type("R", (), {"id": 2, "score": 0.2, "metadata": meta2}),
+            SearchResult(id=i, score=i / 10, metadata=md)
+            for i, md in enumerate(metadatas, start=1)
         ]
 
-    monkeypatch.setattr(module, "client", type("C", (), {"search": fake_search})())
-    res = proxy.lambda_handler({"operation": "search", "embedding": [0.1], "entities": ["ORG:Acme"]}, {})
-    assert len(res["matches"]) == 1 and res["matches"][0]["metadata"]["entities"] == [
-        "ORG:Acme"
-    ]
-
-
-def test_vector_search_guid_filter(monkeypatch, config):
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    import types, sys
-
-    dummy = types.ModuleType("pymilvus")
-    dummy.Collection = type("Coll", (), {"__init__": lambda self, *a, **k: None})
-    dummy.connections = types.SimpleNamespace(connect=lambda alias, host, port: None)
-    monkeypatch.setitem(sys.modules, "pymilvus", dummy)
-    import common_utils.milvus_client as mc
-
-    monkeypatch.setattr(mc, "Collection", dummy.Collection, raising=False)
-    monkeypatch.setattr(mc, "connections", dummy.connections, raising=False)
-
-    module = import_vector_module("milvus_handler_lambda")
-    proxy = import_vector_module("vector_db_proxy_lambda")
-
-    def fake_search(self, embedding, top_k=5):
-        meta1 = {"file_guid": "g1", "file_name": "a"}
-        meta2 = {"file_guid": "g2", "file_name": "b"}
-        return [
-            type("R", (), {"id": 1, "score": 0.1, "metadata": meta1}),
-            type("R", (), {"id": 2, "score": 0.2, "metadata": meta2}),
-        ]
-
-    monkeypatch.setattr(module, "client", type("C", (), {"search": fake_search})())
-    res = proxy.lambda_handler({"operation": "search", "embedding": [0.1], "file_guid": "g2"}, {})
-    assert len(res["matches"]) == 1 and res["matches"][0]["metadata"]["file_guid"] == "g2"
+    monkeypatch.setattr(module, "client", types.SimpleNamespace(search=fake_search))
+    res = proxy.lambda_handler(dict(filters, operation="search", embedding=[0.1]), {})
+    assert len(res["matches"]) == 1
+    assert res["matches"][0]["id"] == expected_id
+    assert res["matches"][0]["metadata"] == metadatas[expected_id - 1]
 
 
 def test_file_processing_passthrough(monkeypatch, s3_stub):
@@ -1229,11 +1110,8 @@ def test_summary_lambda_docx():
 
 
 def test_processing_status(monkeypatch, s3_stub, config):
-    prefix = "/parameters/aio/ameritasAI/dev"
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    config[f"{prefix}/IDP_BUCKET"] = "bucket"
     text_doc_prefix = "text-docs/"
-    config[f"{prefix}/TEXT_DOC_PREFIX"] = text_doc_prefix
+    config.update(_cfg(IDP_BUCKET="bucket", TEXT_DOC_PREFIX=text_doc_prefix))
     module = load_lambda(
         "status_lambda", "services/file-ingestion/src/file_processing_status_lambda.py"
     )
@@ -1251,76 +1129,49 @@ def test_text_chunk_guid_metadata(config):
     event = {"text": "hello world", "file_guid": "abc", "file_name": "f.pdf"}
     out = module.lambda_handler(event, {})
     md = out["chunks"][0]["metadata"]
-    import hashlib
     expected_hash = hashlib.sha256("hello world".encode("utf-8")).hexdigest()
     assert md["file_guid"] == "abc" and md["file_name"] == "f.pdf"
     assert md["hash_key"] == expected_hash
 
 
-def test_embed_propagates_guid(config):
+@pytest.mark.parametrize(
+    "algo, expected",
+    [
+        ("blake2b", hashlib.blake2b(b"hello world", digest_size=32).hexdigest()),
+        ("unknown", hashlib.sha256(b"hello world").hexdigest()),
+    ],
+    ids=["blake2b", "fallback"],
+)
+def test_text_chunk_hash_algo(monkeypatch, config, algo, expected):
+    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
+    monkeypatch.setenv("HASH_ALGO", algo)
+    module = load_lambda("chunk_hash", "services/rag-stack/src/text_chunk_lambda.py")
+    out = module.lambda_handler({"text": "hello world"}, {})
+    assert out["chunks"][0]["metadata"]["hash_key"] == expected
+
+
+def test_embed_propagates_guid(monkeypatch, config):
     config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
     chunk_mod = load_lambda("chunk_guid", "services/rag-stack/src/text_chunk_lambda.py")
     embed_mod = load_lambda("embed_guid", "services/rag-stack/src/embed_lambda.py")
-    embed_mod._MODEL_MAP["sbert"] = lambda t: [0.0]
+    monkeypatch.setitem(embed_mod._BATCH_MODEL_MAP, "sbert", lambda ts: [[0.0] for _ in ts])
     chunks = chunk_mod.lambda_handler({"text": "hello", "file_guid": "g", "file_name": "n"}, {})["chunks"]
     out = embed_mod.lambda_handler({"chunks": chunks}, {})
     md = out["metadatas"][0]
-    import hashlib
     expected_hash = hashlib.sha256("hello".encode("utf-8")).hexdigest()
     assert md["file_guid"] == "g" and md["file_name"] == "n" and md["hash_key"] == expected_hash
 
 
-def test_milvus_insert_adds_guid(monkeypatch, config):
+def test_milvus_insert_adds_guid(monkeypatch, config, pymilvus_stub):
     config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    import types, sys
-
-    dummy = types.ModuleType("pymilvus")
-    dummy.Collection = type("Coll", (), {"__init__": lambda self, *a, **k: None})
-    dummy.connections = types.SimpleNamespace(connect=lambda alias, host, port: None)
-    monkeypatch.setitem(sys.modules, "pymilvus", dummy)
-    import common_utils.milvus_client as mc
-
-    monkeypatch.setattr(mc, "Collection", dummy.Collection, raising=False)
-    monkeypatch.setattr(mc, "connections", dummy.connections, raising=False)
-
     module = import_vector_module("milvus_handler_lambda")
     proxy = import_vector_module("vector_db_proxy_lambda")
-    monkeypatch.setattr(module, "client", type("C", (), {"insert": lambda s, i, upsert=True: len(i)})())
+    monkeypatch.setattr(module, "client", types.SimpleNamespace(insert=lambda i, upsert=True: len(i)))
     event = {"embeddings": [[0.1]], "metadatas": [{}], "file_guid": "g", "file_name": "n"}
     res = proxy.lambda_handler(dict(event, operation="insert"), {})
     assert res["inserted"] == 1
 
 
-def test_vector_search_guid_filter(monkeypatch, config):
-    config["/parameters/aio/ameritasAI/SERVER_ENV"] = "dev"
-    import types, sys
-
-    dummy = types.ModuleType("pymilvus")
-    dummy.Collection = type("Coll", (), {"__init__": lambda self, *a, **k: None})
-    dummy.connections = types.SimpleNamespace(connect=lambda alias, host, port: None)
-    monkeypatch.setitem(sys.modules, "pymilvus", dummy)
-    import common_utils.milvus_client as mc
-
-    monkeypatch.setattr(mc, "Collection", dummy.Collection, raising=False)
-    monkeypatch.setattr(mc, "connections", dummy.connections, raising=False)
-
-    module = import_vector_module("milvus_handler_lambda")
-    proxy = import_vector_module("vector_db_proxy_lambda")
-
-    def fake_search(self, embedding, top_k=5):
-        meta1 = {"file_guid": "g1", "file_name": "a"}
-        meta2 = {"file_guid": "g2", "file_name": "b"}
-        return [
-            type("R", (), {"id": 1, "score": 0.1, "metadata": meta1}),
-            type("R", (), {"id": 2, "score": 0.2, "metadata": meta2}),
-        ]
-
-    monkeypatch.setattr(module, "client", type("C", (), {"search": fake_search})())
-    res = proxy.lambda_handler({"operation": "search", "embedding": [0.1], "file_guid": "g2"}, {})
-    assert len(res["matches"]) == 1
-    assert res["matches"][0]["metadata"]["file_guid"] == "g2"
-
-
 def test_detect_pii_ml(monkeypatch, validate_pii_schema):
     module = load_lambda(
         "detect_pii_ml", "services/anonymization/src/detect_sensitive_info_lambda.py"
@@ -1435,6 +1286,19 @@ def test_detect_pii_custom_regex(monkeypatch, validate_pii_schema):
     assert any(e["type"] == "FOO" for e in out["entities"])
 
 
+def test_detect_pii_invalid_regex_skipped(monkeypatch, validate_pii_schema):
+    monkeypatch.setenv("REGEX_PATTERNS", json.dumps({"BAD": "(", "FOO": r"foo\d+"}))
+    module = load_lambda(
+        "detect_pii_bad_regex", "services/anonymization/src/detect_sensitive_info_lambda.py"
+    )
+    assert "BAD" not in module._REGEX_PATTERNS
+
+    monkeypatch.setattr(module, "_build_engine", lambda *a, **k: None)
+    out = module.lambda_handler({"text": "foo123"}, {})
+    validate_pii_schema(out)
+    assert [e["type"] for e in out["entities"]] == ["FOO"]
+
+
 class _DummyRes:
     def __init__(self, typ, start, end, score=1.0):
         self.entity_type = typ
@@ -1443,29 +1307,7 @@ class _DummyRes:
         self.score = score
 
 
-def test_detect_and_mask(monkeypatch):
-    import types, sys
-    class FakeGen:
-        def __init__(self):
-            self.count = 0
-        def name(self):
-            self.count += 1
-            return f"name{self.count}"
-        def company(self):
-            return "company"
-        def city(self):
-            return "city"
-        def address(self):
-            return "addr"
-        def phone_number(self):
-            return "phone"
-        def email(self):
-            return "email"
-        def word(self):
-            return "word"
-    fake = FakeGen()
-    monkeypatch.setitem(sys.modules, "faker", types.SimpleNamespace(Faker=lambda: fake))
-
+def test_detect_and_mask(monkeypatch, faker_stub):
     detect = load_lambda(
         "detect_mask", "services/anonymization/src/detect_sensitive_info_lambda.py"
     )
@@ -1485,29 +1327,7 @@ def test_detect_and_mask(monkeypatch):
     assert out["text"] == "[PERSON] met [PERSON]."
 
 
-def test_detect_and_mask_confidence(monkeypatch):
-    import types, sys
-    class FakeGen:
-        def __init__(self):
-            self.count = 0
-        def name(self):
-            self.count += 1
-            return f"name{self.count}"
-        def company(self):
-            return "company"
-        def city(self):
-            return "city"
-        def address(self):
-            return "addr"
-        def phone_number(self):
-            return "phone"
-        def email(self):
-            return "email"
-        def word(self):
-            return "word"
-    fake = FakeGen()
-    monkeypatch.setitem(sys.modules, "faker", types.SimpleNamespace(Faker=lambda: fake))
-
+def test_detect_and_mask_confidence(monkeypatch, faker_stub):
     detect = load_lambda(
         "detect_mask_conf", "services/anonymization/src/detect_sensitive_info_lambda.py"
     )
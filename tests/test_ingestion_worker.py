@@ -10,31 +10,37 @@ def load_lambda(name, path):
     return module
 
 
-def test_worker_starts_state_machine(monkeypatch):
-    monkeypatch.setenv("STATE_MACHINE_ARN", "arn")
+class FakeSF:
+    def __init__(self):
+        self.started = {}
+
+    def start_execution(self, stateMachineArn=None, input=None):
+        self.started["arn"] = stateMachineArn
+        self.started["input"] = json.loads(input)
+
 
-    started = {}
+class FakeSQS:
+    def receive_message(self, **kwargs):
+        return {}
 
-    class FakeSF:
-        def start_execution(self, stateMachineArn=None, input=None):
-            started["arn"] = stateMachineArn
-            started["input"] = json.loads(input)
+    def delete_message(self, **kwargs):
+        pass
 
-    class FakeSQS:
-        def receive_message(self, **kwargs):
-            return {}
-        def delete_message(self, **kwargs):
-            pass
 
-    import boto3
-    monkeypatch.setattr(sys.modules["boto3"], "client", lambda name: FakeSF() if name == "stepfunctions" else FakeSQS())
+def test_worker_starts_state_machine(monkeypatch):
+    monkeypatch.setenv("STATE_MACHINE_ARN", "arn")
+
+    sf, sqs = FakeSF(), FakeSQS()
+    monkeypatch.setattr(
+        sys.modules["boto3"], "client", lambda name: sf if name == "stepfunctions" else sqs
+    )
 
     module = load_lambda("worker", "services/rag-stack/src/ingestion_worker_lambda.py")
     event = {"Records": [{"body": json.dumps({"text": "t", "collection_name": "c"})}]}
     module.lambda_handler(event, {})
 
-    assert started["arn"] == "arn"
-    assert started["input"]["text"] == "t"
+    assert sf.started["arn"] == "arn"
+    assert sf.started["input"]["text"] == "t"
 
 
 def test_worker_reports_failed_messages(monkeypatch):
@@ -1,54 +1,107 @@
-import importlib.util
 import json
-import io
 import sys
 import types
 import pytest
+from conftest import load_lambda
+
+
+class _Body:
+    """``invoke_model`` response body holding pre-encoded bytes."""
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data):
+        self._data = data
+
+    def read(self):
+        return self._data
+
+
+_REPLY_OK = json.dumps({'choices': [{'message': {'content': 'ok'}}]}).encode()
+_REPLY_RESP = json.dumps({'choices': [{'message': {'content': 'resp'}}]}).encode()
+
+
+@pytest.fixture
+def load_invoke(monkeypatch):
+    """Return a loader that applies env vars, reloads the backends and loads the Lambda.
+
+    ``llm_invocation.backends`` reads its settings at import, so the reload
+    is what makes each test's environment take effect.
+    """
+    monkeypatch.setattr(
+        sys.modules['httpx'], 'HTTPStatusError', type('E', (Exception,), {}), raising=False
+    )
+
+    def _load(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        import importlib, llm_invocation.backends
+        importlib.reload(llm_invocation.backends)
+        return load_lambda('invoke', 'services/llm-gateway/src/llm_invocation_lambda.py')
+
+    return _load
+
+
+@pytest.mark.parametrize(
+    'env,extra,expected',
+    [
+        (
+            {'OLLAMA_ENDPOINT': 'http://ollama', 'OLLAMA_DEFAULT_MODEL': 'phi'},
+            {},
+            {'model': 'phi', 'prompt': 'hi'},
+        ),
+        (
+            {
+                'OLLAMA_ENDPOINTS': 'http://o1',
+                'OLLAMA_DEFAULT_MODEL': 'phi',
+                'OLLAMA_NUM_CTX': '99',
+                'OLLAMA_REPEAT_LAST_N': '7',
+                'OLLAMA_REPEAT_PENALTY': '1.2',
+                'OLLAMA_TEMPERATURE': '0.3',
+                'OLLAMA_SEED': '5',
+                'OLLAMA_STOP': 'END',
+                'OLLAMA_NUM_PREDICT': '12',
+                'OLLAMA_TOP_K': '23',
+                'OLLAMA_TOP_P': '0.8',
+                'OLLAMA_MIN_P': '0.02',
+            },
+            {},
+            {
+                'model': 'phi',
+                'num_ctx': 99,
+                'repeat_last_n': 7,
+                'repeat_penalty': 1.2,
+                'temperature': 0.3,
+                'seed': 5,
+                'stop': 'END',
+                'num_predict': 12,
+                'top_k': 23,
+                'top_p': 0.8,
+                'min_p': 0.02,
+            },
+        ),
+        ({'OLLAMA_ENDPOINT': 'http://o'}, {'system_prompt': 'sys'}, {'system': 'sys'}),
+    ],
+    ids=['default_model', 'sampling_defaults', 'system_prompt'],
+)
+def test_invoke_ollama(monkeypatch, load_invoke, env, extra, expected):
+    module = load_invoke(**env)
+
+    sent = []
 
+    def fake_post(url, json=None):
+        sent.append(json)
+        return types.SimpleNamespace(json=lambda: {'reply': 'ok'}, raise_for_status=lambda: None)
 
-def load_lambda(name, path):
-    spec = importlib.util.spec_from_file_location(name, path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
-
-
-def test_invoke_ollama(monkeypatch):
-    sys.modules['httpx'].HTTPStatusError = type('E', (Exception,), {})
-    monkeypatch.setenv('OLLAMA_ENDPOINT', 'http://ollama')
-    monkeypatch.setenv('OLLAMA_DEFAULT_MODEL', 'phi')
-    import importlib, llm_invocation.backends
-    importlib.reload(llm_invocation.backends)
-    module = load_lambda('invoke', 'services/llm-gateway/src/llm_invocation_lambda.py')
-
-    class FakeResponse:
-        def __init__(self, payload):
-            self._payload = payload
-        def json(self):
-            return self._payload
-        def raise_for_status(self):
-            pass
-
-    import llm_invocation.backends as backends
-    monkeypatch.setattr(backends.httpx, 'post', lambda url, json=None: FakeResponse({'reply': 'ok', 'model': json.get('model')}))
-    out = module.lambda_handler({'backend': 'ollama', 'prompt': 'hi'}, {})
-    assert out['reply'] == 'ok'
-    assert out['model'] == 'phi'
+    monkeypatch.setattr(sys.modules['httpx'], 'post', fake_post)
+    out = module.lambda_handler(dict(extra, backend='ollama', prompt='hi'), {})
+    assert out == {'reply': 'ok'}
+    assert {key: sent[0][key] for key in expected} == expected
 
 
-def test_invoke_bedrock_runtime(monkeypatch):
-    sys.modules['httpx'].HTTPStatusError = type('E', (Exception,), {})
+def test_invoke_bedrock_runtime(monkeypatch, load_invoke):
     monkeypatch.delenv('BEDROCK_OPENAI_ENDPOINTS', raising=False)
     monkeypatch.delenv('BEDROCK_OPENAI_ENDPOINT', raising=False)
-    monkeypatch.setenv('BEDROCK_TEMPERATURE', '0.2')
-    monkeypatch.setenv('BEDROCK_NUM_CTX', '128')
-    monkeypatch.setenv('BEDROCK_MAX_TOKENS', '99')
-    monkeypatch.setenv('BEDROCK_TOP_P', '0.7')
-    monkeypatch.setenv('BEDROCK_TOP_K', '7')
-    monkeypatch.setenv('BEDROCK_MAX_TOKENS_TO_SAMPLE', '33')
-    import importlib, llm_invocation.backends
-    importlib.reload(llm_invocation.backends)
-    module = load_lambda('invoke', 'services/llm-gateway/src/llm_invocation_lambda.py')
 
     class FakeRuntime:
         def invoke_model(self, body=None, modelId=None, contentType=None, accept=None):
@@ -59,25 +112,73 @@ def test_invoke_bedrock_runtime(monkeypatch):
             assert payload['top_p'] == 0.7
             assert payload['top_k'] == 7
             assert payload['max_tokens_to_sample'] == 33
-            data = {
-                'choices': [
-                    {'message': {'content': 'resp'}}
-                ]
-            }
-            return {'body': io.BytesIO(json.dumps(data).encode())}
-
-    import llm_invocation.backends as backends
-    monkeypatch.setattr(backends.boto3, 'client', lambda name: FakeRuntime())
+            return {'body': _Body(_REPLY_RESP)}
+
+    created = []
+    monkeypatch.setattr(
+        sys.modules['boto3'], 'client', lambda name: created.append(name) or FakeRuntime()
+    )
+    module = load_invoke(
+        BEDROCK_TEMPERATURE='0.2',
+        BEDROCK_NUM_CTX='128',
+        BEDROCK_MAX_TOKENS='99',
+        BEDROCK_TOP_P='0.7',
+        BEDROCK_TOP_K='7',
+        BEDROCK_MAX_TOKENS_TO_SAMPLE='33',
+    )
+
+    # without BEDROCK_RUNTIME_WARMUP the client is created on first use
+    assert created == []
     out = module.lambda_handler({'backend': 'bedrock', 'prompt': 'hi', 'model': 'm'}, {})
     assert out['reply'] == 'resp'
+    assert created == ['bedrock-runtime']
+
+
+@pytest.mark.parametrize(
+    'env,expected',
+    [
+        ({'BEDROCK_RUNTIME_WARMUP': 'true'}, ['bedrock-runtime']),
+        ({'OLLAMA_ENDPOINTS': 'http://o1'}, []),
+        (
+            {'BEDROCK_RUNTIME_WARMUP': 'true', 'BEDROCK_OPENAI_ENDPOINTS': 'http://b1'},
+            [],
+        ),
+    ],
+    ids=['flag', 'ollama_only', 'openai_endpoints'],
+)
+def test_bedrock_runtime_warmup(monkeypatch, load_invoke, env, expected):
+    monkeypatch.delenv('BEDROCK_OPENAI_ENDPOINTS', raising=False)
+    monkeypatch.delenv('BEDROCK_OPENAI_ENDPOINT', raising=False)
+    created = []
+    monkeypatch.setattr(sys.modules['boto3'], 'client', lambda name: created.append(name))
+    load_invoke(**env)
+    assert created == expected
 
 
-def test_round_robin_ollama(monkeypatch):
-    sys.modules['httpx'].HTTPStatusError = type('E', (Exception,), {})
-    monkeypatch.setenv('OLLAMA_ENDPOINTS', 'http://o1,http://o2')
+def test_bedrock_runtime_client_reused(monkeypatch):
+    monkeypatch.delenv('BEDROCK_OPENAI_ENDPOINTS', raising=False)
+    monkeypatch.delenv('BEDROCK_OPENAI_ENDPOINT', raising=False)
     import importlib, llm_invocation.backends
-    importlib.reload(llm_invocation.backends)
-    module = load_lambda('invoke', 'services/llm-gateway/src/llm_invocation_lambda.py')
+    backends = importlib.reload(llm_invocation.backends)
+
+    created = []
+
+    class FakeRuntime:
+        def invoke_model(self, body=None, modelId=None, contentType=None, accept=None):
+            return {'body': _Body(_REPLY_OK)}
+
+    def fake_client(name):
+        created.append(name)
+        return FakeRuntime()
+
+    monkeypatch.setattr(backends.boto3, 'client', fake_client)
+    backends.invoke_bedrock_runtime('a', 'm')
+    backends.invoke_bedrock_runtime('b', 'm')
+    assert created == ['bedrock-runtime']
+
+
+def test_round_robin_ollama(monkeypatch, load_invoke):
+    module = load_invoke(OLLAMA_ENDPOINTS='http://o1,http://o2')
 
     calls = []
 
@@ -100,12 +201,8 @@ def test_round_robin_ollama(monkeypatch):
     assert calls[0] != calls[1]
 
 
-def test_round_robin_bedrock_openai(monkeypatch):
-    sys.modules['httpx'].HTTPStatusError = type('E', (Exception,), {})
-    monkeypatch.setenv('BEDROCK_OPENAI_ENDPOINTS', 'http://b1,http://b2')
-    import importlib, llm_invocation.backends
-    importlib.reload(llm_invocation.backends)
-    module = load_lambda('invoke', 'services/llm-gateway/src/llm_invocation_lambda.py')
+def test_round_robin_bedrock_openai(monkeypatch, load_invoke):
+    module = load_invoke(BEDROCK_OPENAI_ENDPOINTS='http://b1,http://b2')
 
     calls = []
 
@@ -128,18 +225,16 @@ def test_round_robin_bedrock_openai(monkeypatch):
     assert calls[0] != calls[1]
 
 
-def test_bedrock_openai_defaults(monkeypatch):
-    sys.modules['httpx'].HTTPStatusError = type('E', (Exception,), {})
-    monkeypatch.setenv('BEDROCK_OPENAI_ENDPOINTS', 'http://b1')
-    monkeypatch.setenv('BEDROCK_TEMPERATURE', '0.3')
-    monkeypatch.setenv('BEDROCK_NUM_CTX', '200')
-    monkeypatch.setenv('BEDROCK_MAX_TOKENS', '150')
-    monkeypatch.setenv('BEDROCK_TOP_P', '0.8')
-    monkeypatch.setenv('BEDROCK_TOP_K', '42')
-    monkeypatch.setenv('BEDROCK_MAX_TOKENS_TO_SAMPLE', '123')
-    import importlib, llm_invocation.backends
-    importlib.reload(llm_invocation.backends)
-    module = load_lambda('invoke', 'services/llm-gateway/src/llm_invocation_lambda.py')
+def test_bedrock_openai_defaults(monkeypatch, load_invoke):
+    module = load_invoke(
+        BEDROCK_OPENAI_ENDPOINTS='http://b1',
+        BEDROCK_TEMPERATURE='0.3',
+        BEDROCK_NUM_CTX='200',
+        BEDROCK_MAX_TOKENS='150',
+        BEDROCK_TOP_P='0.8',
+        BEDROCK_TOP_K='42',
+        BEDROCK_MAX_TOKENS_TO_SAMPLE='123',
+    )
 
     captured = {}
 
@@ -167,61 +262,8 @@ def test_bedrock_openai_defaults(monkeypatch):
     assert sent['max_tokens_to_sample'] == 123
 
 
-def test_ollama_defaults(monkeypatch):
-    sys.modules['httpx'].HTTPStatusError = type('E', (Exception,), {})
-    monkeypatch.setenv('OLLAMA_ENDPOINTS', 'http://o1')
-    monkeypatch.setenv('OLLAMA_DEFAULT_MODEL', 'phi')
-    monkeypatch.setenv('OLLAMA_NUM_CTX', '99')
-    monkeypatch.setenv('OLLAMA_REPEAT_LAST_N', '7')
-    monkeypatch.setenv('OLLAMA_REPEAT_PENALTY', '1.2')
-    monkeypatch.setenv('OLLAMA_TEMPERATURE', '0.3')
-    monkeypatch.setenv('OLLAMA_SEED', '5')
-    monkeypatch.setenv('OLLAMA_STOP', 'END')
-    monkeypatch.setenv('OLLAMA_NUM_PREDICT', '12')
-    monkeypatch.setenv('OLLAMA_TOP_K', '23')
-    monkeypatch.setenv('OLLAMA_TOP_P', '0.8')
-    monkeypatch.setenv('OLLAMA_MIN_P', '0.02')
-    import importlib, llm_invocation.backends
-    importlib.reload(llm_invocation.backends)
-    module = load_lambda('invoke', 'services/llm-gateway/src/llm_invocation_lambda.py')
-
-    captured = {}
-
-    class FakeResponse:
-        def __init__(self, payload):
-            self.payload = payload
-        def json(self):
-            return {'ok': True}
-        def raise_for_status(self):
-            pass
-
-    def fake_post(url, json=None):
-        captured['json'] = json
-        return FakeResponse(json)
-
-    import llm_invocation.backends as backends2
-    monkeypatch.setattr(backends2.httpx, 'post', fake_post)
-    module.lambda_handler({'backend': 'ollama', 'prompt': 'hi'}, {})
-    sent = captured['json']
-    assert sent['model'] == 'phi'
-    assert sent['num_ctx'] == 99
-    assert sent['repeat_last_n'] == 7
-    assert sent['repeat_penalty'] == 1.2
-    assert sent['temperature'] == 0.3
-    assert sent['seed'] == 5
-    assert sent['stop'] == 'END'
-    assert sent['num_predict'] == 12
-    assert sent['top_k'] == 23
-    assert sent['top_p'] == 0.8
-    assert sent['min_p'] == 0.02
-
-
-def test__invoke_bedrock_openai(monkeypatch):
-    sys.modules['httpx'].HTTPStatusError = type('E', (Exception,), {})
-    monkeypatch.setenv('BEDROCK_OPENAI_ENDPOINTS', 'http://b1')
-    import importlib, llm_invocation.backends
-    importlib.reload(llm_invocation.backends)
-    module = load_lambda('invoke', 'services/llm-gateway/src/llm_invocation_lambda.py')
+def test__invoke_bedrock_openai(monkeypatch, load_invoke):
+    module = load_invoke(BEDROCK_OPENAI_ENDPOINTS='http://b1')
 
     class FakeResponse:
         def json(self):
@@ -237,12 +279,8 @@ def test__invoke_bedrock_openai(monkeypatch):
     assert out == {'foo': 'bar'}
 
 
-def test_bedrock_openai_messages(monkeypatch):
-    sys.modules['httpx'].HTTPStatusError = type('E', (Exception,), {})
-    monkeypatch.setenv('BEDROCK_OPENAI_ENDPOINTS', 'http://b1')
-    import importlib, llm_invocation.backends
-    importlib.reload(llm_invocation.backends)
-    module = load_lambda('invoke', 'services/llm-gateway/src/llm_invocation_lambda.py')
+def test_bedrock_openai_messages(monkeypatch, load_invoke):
+    module = load_invoke(BEDROCK_OPENAI_ENDPOINTS='http://b1')
 
     captured = {}
 
@@ -269,24 +307,18 @@ def test_bedrock_openai_messages(monkeypatch):
     assert 'prompt' not in captured['json']
 
 
-def test_invoke_bedrock_runtime_with_system(monkeypatch):
-    sys.modules['httpx'].HTTPStatusError = type('E', (Exception,), {})
+def test_invoke_bedrock_runtime_with_system(monkeypatch, load_invoke):
     monkeypatch.delenv('BEDROCK_OPENAI_ENDPOINTS', raising=False)
     monkeypatch.delenv('BEDROCK_OPENAI_ENDPOINT', raising=False)
-    import importlib, llm_invocation.backends
-    importlib.reload(llm_invocation.backends)
-    module = load_lambda('invoke', 'services/llm-gateway/src/llm_invocation_lambda.py')
-
     captured = {}
 
     class FakeRuntime:
         def invoke_model(self, body=None, modelId=None, contentType=None, accept=None):
             captured['body'] = json.loads(body)
-            data = {'choices': [{'message': {'content': 'ok'}}]}
-            return {'body': io.BytesIO(json.dumps(data).encode())}
+            return {'body': _Body(_REPLY_OK)}
 
-    import llm_invocation.backends as backends
-    monkeypatch.setattr(backends.boto3, 'client', lambda name: FakeRuntime())
+    monkeypatch.setattr(sys.modules['boto3'], 'client', lambda name: FakeRuntime())
+    module = load_invoke()
 
     module.lambda_handler({'backend': 'bedrock', 'prompt': 'u', 'system_prompt': 's'}, {})
     assert captured['body']['messages'] == [
@@ -295,36 +327,6 @@ def test_invoke_bedrock_runtime_with_system(monkeypatch):
     ]
 
 
-def test_ollama_system_prompt(monkeypatch):
-    sys.modules['httpx'].HTTPStatusError = type('E', (Exception,), {})
-    monkeypatch.setenv('OLLAMA_ENDPOINT', 'http://o')
-    import importlib, llm_invocation.backends
-    importlib.reload(llm_invocation.backends)
-    module = load_lambda('invoke', 'services/llm-gateway/src/llm_invocation_lambda.py')
-
-    captured = {}
-
-    class FakeResponse:
-        def __init__(self, payload):
-            self.payload = payload
-
-        def json(self):
-            return {'ok': True}
-
-        def raise_for_status(self):
-            pass
-
-    def fake_post(url, json=None):
-        captured['json'] = json
-        return FakeResponse(json)
-
-    import llm_invocation.backends as backends
-    monkeypatch.setattr(backends.httpx, 'post', fake_post)
-
-    module.lambda_handler({'backend': 'ollama', 'prompt': 'hi', 'system_prompt': 'sys'}, {})
-    assert captured['json']['system'] == 'sys'
-
-
 def test_make_selector_round_robin():
     from llm_invocation.backends import _make_selector
 
@@ -340,16 +342,13 @@ def test_make_selector_empty():
         select()
 
 
-def test_failed_endpoint_skipped(monkeypatch):
+def test_failed_endpoint_skipped(monkeypatch, load_invoke):
     class E(Exception):
         def __init__(self):
             self.response = types.SimpleNamespace(status_code=500, text='err')
 
-    sys.modules['httpx'].HTTPStatusError = E
-    monkeypatch.setenv('OLLAMA_ENDPOINTS', 'http://o1,http://o2')
-    import importlib, llm_invocation.backends
-    importlib.reload(llm_invocation.backends)
-    module = load_lambda('invoke', 'services/llm-gateway/src/llm_invocation_lambda.py')
+    monkeypatch.setattr(sys.modules['httpx'], 'HTTPStatusError', E)
+    module = load_invoke(OLLAMA_ENDPOINTS='http://o1,http://o2')
 
     calls = []
 
@@ -382,3 +381,14 @@ def test_failed_endpoint_skipped(monkeypatch):
     assert out2['endpoint'] == 'http://o2'
     assert calls == ['http://o1', 'http://o2']
 
+
+
+def test_health_checked_selector_skips_failed_endpoint():
+    from llm_invocation.backends import _HealthCheckedSelector
+
+    selector = _HealthCheckedSelector(['a', 'b'], cooldown=60)
+    selector.record_failure('a')
+    assert [selector.choose() for _ in range(3)] == ['b', 'b', 'b']
+
+    selector.record_success('a')
+    assert {selector.choose(), selector.choose()} == {'a', 'b'}
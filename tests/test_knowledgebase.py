@@ -1,40 +1,16 @@
-import importlib.util
 import json
 import io
 import pytest
-import sys
-import types
+from conftest import load_lambda
 
 
-def _stub_botocore(monkeypatch):
-    botocore = types.ModuleType("botocore")
-    exc_mod = types.ModuleType("botocore.exceptions")
-
-    class ClientError(Exception):
-        pass
-
-    exc_mod.ClientError = ClientError
-    botocore.exceptions = exc_mod
-    monkeypatch.setitem(sys.modules, "botocore", botocore)
-    monkeypatch.setitem(sys.modules, "botocore.exceptions", exc_mod)
-    return ClientError
-
-
-def load_lambda(name, path):
-    spec = importlib.util.spec_from_file_location(name, path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
-
-
-def test_kb_ingest(monkeypatch):
+def test_kb_ingest(monkeypatch, botocore_stub):
     calls = []
     class FakeSFN:
         def start_execution(self, stateMachineArn=None, input=None):
             calls.append((stateMachineArn, json.loads(input)))
             return {}
     import boto3
-    _stub_botocore(monkeypatch)
     monkeypatch.setattr(boto3, 'client', lambda name: FakeSFN())
     monkeypatch.setenv("STATE_MACHINE_ARN", "arn")
     monkeypatch.setenv("FILE_INGESTION_STATE_MACHINE_ARN", "filearn")
@@ -64,9 +40,8 @@ def test_kb_ingest(monkeypatch):
     assert calls[1][1]['storage_mode'] == 'persistent'
 
 
-def test_kb_ingest_missing_arn(monkeypatch):
+def test_kb_ingest_missing_arn(monkeypatch, botocore_stub):
     import boto3
-    _stub_botocore(monkeypatch)
 
     class FakeSFN:
         pass
@@ -78,9 +53,8 @@ def test_kb_ingest_missing_arn(monkeypatch):
         load_lambda('ingest_noenv', 'services/knowledge-base/src/ingest_lambda.py')
 
 
-def test_kb_ingest_missing_file_arn(monkeypatch):
+def test_kb_ingest_missing_file_arn(monkeypatch, botocore_stub):
     import boto3
-    _stub_botocore(monkeypatch)
 
     class FakeSFN:
         pass
@@ -92,7 +66,7 @@ def test_kb_ingest_missing_file_arn(monkeypatch):
         load_lambda('ingest_noenv2', 'services/knowledge-base/src/ingest_lambda.py')
 
 
-def test_kb_ingest_error(monkeypatch):
+def test_kb_ingest_error(monkeypatch, botocore_stub):
     calls = []
 
     class FakeSFN:
@@ -107,7 +81,7 @@ def test_kb_ingest_error(monkeypatch):
             raise ClientError({'Error': {'Code': '400', 'Message': 'bad'}}, 'start_execution')
 
     import boto3
-    ClientError = _stub_botocore(monkeypatch)
+    ClientError = botocore_stub
     monkeypatch.setattr(boto3, 'client', lambda name: FakeSFN())
     monkeypatch.setenv('STATE_MACHINE_ARN', 'arn')
     monkeypatch.setenv('FILE_INGESTION_STATE_MACHINE_ARN', 'filearn')
@@ -120,13 +94,12 @@ def test_kb_ingest_error(monkeypatch):
     assert calls[1] == 'arn'
 
 
-def test_kb_ingest_bad_prefix(monkeypatch):
+def test_kb_ingest_bad_prefix(monkeypatch, botocore_stub):
     class FakeSFN:
         def start_execution(self, *a, **k):
             raise AssertionError("should not be called")
 
     import boto3
-    _stub_botocore(monkeypatch)
     monkeypatch.setattr(boto3, 'client', lambda name: FakeSFN())
     monkeypatch.setenv('STATE_MACHINE_ARN', 'arn')
     monkeypatch.setenv('FILE_INGESTION_STATE_MACHINE_ARN', 'filearn')
@@ -136,13 +109,12 @@ def test_kb_ingest_bad_prefix(monkeypatch):
     assert out['started'] is False
 
 
-def test_kb_query(monkeypatch):
+def test_kb_query(monkeypatch, botocore_stub):
     import boto3
     class FakeSQS:
         def send_message(self, QueueUrl=None, MessageBody=None):
             FakeSQS.body = json.loads(MessageBody)
             return {'MessageId': '1'}
-    _stub_botocore(monkeypatch)
     monkeypatch.setattr(boto3, 'client', lambda name: FakeSQS())
     monkeypatch.setenv('SUMMARY_QUEUE_URL', 'url')
     module = load_lambda('query', 'services/knowledge-base/src/query_lambda.py')
@@ -152,9 +124,8 @@ def test_kb_query(monkeypatch):
     assert FakeSQS.body['team'] == 'x'
 
 
-def test_kb_query_missing_arn(monkeypatch):
+def test_kb_query_missing_arn(monkeypatch, botocore_stub):
     import boto3
-    _stub_botocore(monkeypatch)
 
     class FakeSQS:
         def send_message(self, QueueUrl=None, MessageBody=None):
@@ -168,9 +139,9 @@ def test_kb_query_missing_arn(monkeypatch):
     assert 'SUMMARY_QUEUE_URL' in out['error']
 
 
-def test_kb_query_error(monkeypatch):
+def test_kb_query_error(monkeypatch, botocore_stub):
     import boto3
-    ClientError = _stub_botocore(monkeypatch)
+    ClientError = botocore_stub
 
     class FakeSQS:
         def send_message(self, QueueUrl=None, MessageBody=None):
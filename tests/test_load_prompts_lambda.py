@@ -1,6 +1,7 @@
 import importlib.util
 import sys
 import json
+import threading
 
 
 def load_lambda(name, path):
@@ -29,7 +30,11 @@ def test_load_prompts(monkeypatch):
         def json(self):
             return self._data
 
+    # both requests must be in flight together or the barrier times out
+    barrier = threading.Barrier(2, timeout=5)
+
     def fake_post(url, json=None):
+        barrier.wait()
         sent.append({"url": url, "json": json})
         if json.get("workflow_id") == "aps":
             return Resp([{"query": "q"}])
@@ -41,6 +46,7 @@ def test_load_prompts(monkeypatch):
 
     module = load_lambda("load", "services/summarization/src/load_prompts_lambda.py")
     out = module.lambda_handler({"workflow_id": "aps"}, {})
+    sent.sort(key=lambda call: call["json"]["workflow_id"])
     assert sent == [
         {"url": "http://engine", "json": {"workflow_id": "aps"}},
         {"url": "http://engine", "json": {"workflow_id": "sys"}},
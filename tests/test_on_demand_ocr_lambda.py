@@ -1,15 +1,8 @@
 import json
-import importlib.util
 import os
 
 from models import S3Event
-
-
-def load_lambda(name, path):
-    spec = importlib.util.spec_from_file_location(name, path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
+from conftest import load_lambda
 
 
 def test_on_demand_ocr(monkeypatch, s3_stub, config):
@@ -33,8 +26,8 @@ def test_on_demand_ocr(monkeypatch, s3_stub, config):
     event = {"Records": [{"body": json.dumps({"bucket": "bucket", "key": "uploads/doc.pdf"})}]}
     module.lambda_handler(event, {})
 
-    out = json.loads(s3_stub.objects[("bucket", f"{text_doc_prefix}doc.json")].decode())
+    out = json.loads(s3_stub.objects[("bucket", f"{text_doc_prefix}doc.json")])
     assert out["documentId"] == "doc"
     assert out["pageCount"] == 1
-    hocr = json.loads(s3_stub.objects[("bucket", f"{hocr_prefix}doc.json")].decode())
+    hocr = json.loads(s3_stub.objects[("bucket", f"{hocr_prefix}doc.json")])
     assert hocr["documentId"] == "doc"
@@ -1,11 +1,4 @@
-import importlib.util
-
-
-def load_lambda(name, path):
-    spec = importlib.util.spec_from_file_location(name, path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
+from conftest import load_lambda
 
 
 def _make_event(prefix):
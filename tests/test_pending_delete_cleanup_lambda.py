@@ -1,15 +1,5 @@
-import importlib.util
 import datetime
-import os, sys
-sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'common', 'layers', 'common-utils', 'python'))
-
-
-def load_lambda(name, path):
-    spec = importlib.util.spec_from_file_location(name, path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
+from conftest import load_lambda
 
 
 def test_cleanup_lambda(monkeypatch, s3_stub):
@@ -52,7 +42,7 @@ def test_cleanup_lambda_handles_client_error(monkeypatch, s3_stub):
     def fail_delete(Bucket=None, Key=None):
         raise s3_stub.exceptions.ClientError({'Error': {}}, 'delete_object')
 
-    monkeypatch.setattr(s3_stub, 'delete_object', fail_delete)
+    monkeypatch.setattr(type(s3_stub), 'delete_object', staticmethod(fail_delete))
     monkeypatch.setattr(module, '_s3', s3_stub)
 
     result = module.lambda_handler({}, {})
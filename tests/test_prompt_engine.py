@@ -1,11 +1,9 @@
-import importlib.util
 import json
 import urllib.request
 import sys
-import os
 import pytest
 import types
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'common', 'layers', 'common-utils', 'python'))
+from conftest import load_lambda
 
 # Stub boto3.dynamodb.conditions.Attr used by the module
 cond_mod = types.ModuleType("boto3.dynamodb.conditions")
@@ -22,13 +20,6 @@ sys.modules.setdefault("boto3.dynamodb", types.ModuleType("boto3.dynamodb"))
 sys.modules["boto3.dynamodb.conditions"] = cond_mod
 
 
-def load_lambda(name, path):
-    spec = importlib.util.spec_from_file_location(name, path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
-
-
 class FakeTable:
     def __init__(self, items=None):
         self.items = items or []
@@ -79,7 +70,7 @@ def test_render_prompt(monkeypatch):
 
     def fake_urlopen(req):
         sent["url"] = req.full_url
-        sent["data"] = json.loads(req.data.decode())
+        sent["data"] = json.loads(req.data)
         return DummyResp({"ok": True})
 
     monkeypatch.setattr(urllib.request, "urlopen", fake_urlopen)
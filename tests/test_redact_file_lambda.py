@@ -1,19 +1,11 @@
-import importlib.util
 import io
 import types
-import importlib.util
-import os, sys
-sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'common', 'layers', 'common-utils', 'python'))
-
 from models import DetectedEntity
+from conftest import load_lambda as _load_lambda
 
 
 def load_lambda(name):
-    spec = importlib.util.spec_from_file_location(name, 'services/file-assembly/src/redact_file_lambda.py')
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
+    return _load_lambda(name, 'services/file-assembly/src/redact_file_lambda.py')
 
 
 def test_map_boxes():
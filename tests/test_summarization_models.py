@@ -1,8 +1,5 @@
 import pytest
 import importlib.util
-import os, sys
-sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'common', 'layers', 'common-utils', 'python'))
 from models import FileProcessingEvent, ProcessingStatusEvent
 from services.summarization.models import SummaryEvent
 
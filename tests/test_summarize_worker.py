@@ -24,7 +24,7 @@ def test_worker_prompt_engine(monkeypatch):
 
     class FakeLambda:
         def invoke(self, FunctionName=None, Payload=None):
-            invoked["payload"] = json.loads(Payload.decode())
+            invoked["payload"] = json.loads(Payload)
             data = {"result": "sum"}
             return {"Payload": io.BytesIO(json.dumps(data).encode())}
 
@@ -89,7 +89,7 @@ def test_worker_legacy_fallback(monkeypatch):
 
     class FakeLambda:
         def invoke(self, FunctionName=None, Payload=None):
-            invoked["payload"] = json.loads(Payload.decode())
+            invoked["payload"] = json.loads(Payload)
             data = {"summary": {"choices": [{"message": {"content": "old"}}]}}
             return {"Payload": io.BytesIO(json.dumps(data).encode())}
 
@@ -1,6 +1,5 @@
 import importlib.util
 import sys
-import types
 import pytest
 
 
@@ -11,32 +10,6 @@ def load_lambda(name, path):
     return module
 
 
-@pytest.fixture
-def faker_stub(monkeypatch):
-    class FakeGen:
-        def __init__(self):
-            self.count = 0
-        def name(self):
-            self.count += 1
-            return f"name{self.count}"
-        def company(self):
-            return "company"
-        def city(self):
-            return "city"
-        def address(self):
-            return "addr"
-        def phone_number(self):
-            return "phone"
-        def email(self):
-            return "email"
-        def word(self):
-            return "word"
-    fake = FakeGen()
-    fake_mod = types.SimpleNamespace(Faker=lambda: fake)
-    monkeypatch.setitem(sys.modules, "faker", fake_mod)
-    return fake
-
-
 @pytest.fixture
 def load_app(monkeypatch, faker_stub):
     def _load():